@@ -1,4 +1,14 @@
 # backend/app/core/auth.py
+# 鉴权：校验 Bearer token，取出 user_id
+#
+# 列表页轮询很频繁，每次都 jwt.decode + HS256 验签比较费 CPU，
+# 所以验过的 token 放进一个有上限的 LRU：命中时只比对 exp，过期的绝不返回；
+# 吊销（退出登录等）走 revoke_token / set_revocation_hook，命中缓存时也会检查
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+
 from fastapi import Depends, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import jwt, JWTError
@@ -7,15 +17,88 @@ from .security import SECRET_KEY, ALGORITHM
 
 bearer = HTTPBearer()
 
+TOKEN_CACHE_SIZE = 4096  # 最多缓存多少个已验签 token
+
+# token -> (user_id, exp 时间戳)
+_token_cache: OrderedDict[str, tuple[int, float]] = OrderedDict()
+# 本进程内吊销的 token -> exp 时间戳（过期后自然失效，顺手清掉）
+_revoked: dict[str, float] = {}
+_lock = threading.Lock()
+
+# 外部吊销检查（比如查 Redis / 数据库里的黑名单），签名：(token, user_id) -> 是否已吊销
+_revocation_hook: Callable[[str, int], bool] | None = None
+
+def set_revocation_hook(hook: Callable[[str, int], bool] | None):
+    global _revocation_hook
+    _revocation_hook = hook
+
+def revoke_token(token: str, exp: float | None = None):
+    """
+    吊销一个 token（退出登录）：从缓存里删掉，并在它过期前一直拒绝
+    """
+    if exp is None:
+        try:
+            exp = float(jwt.get_unverified_claims(token).get("exp") or 0) or time.time() + 86400
+        except JWTError:
+            exp = time.time() + 86400
+    now = time.time()
+    with _lock:
+        _token_cache.pop(token, None)
+        _revoked[token] = exp
+        for t, t_exp in list(_revoked.items()):
+            if t_exp <= now:
+                del _revoked[t]
+
+def clear_token_cache():
+    with _lock:
+        _token_cache.clear()
+
+def _is_revoked(token: str, uid: int) -> bool:
+    if token in _revoked:
+        return True
+    return bool(_revocation_hook and _revocation_hook(token, uid))
+
+def _cached_user_id(token: str, now: float) -> int | None:
+    with _lock:
+        entry = _token_cache.get(token)
+        if entry is None:
+            return None
+        uid, exp = entry
+        if exp <= now:
+            # 已过期：删掉，让下面的完整校验去报 401
+            del _token_cache[token]
+            return None
+        _token_cache.move_to_end(token)
+        return uid
+
+def _cache_user_id(token: str, uid: int, exp: float):
+    with _lock:
+        _token_cache[token] = (uid, exp)
+        _token_cache.move_to_end(token)
+        while len(_token_cache) > TOKEN_CACHE_SIZE:
+            _token_cache.popitem(last=False)
+
 def get_current_user_id(
     creds: HTTPAuthorizationCredentials = Depends(bearer),
 ) -> int:
     token = creds.credentials
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        sub = payload.get("sub")
-        if sub is None:
+    now = time.time()
+
+    uid = _cached_user_id(token, now)
+    if uid is None:
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            sub = payload.get("sub")
+            if sub is None:
+                raise HTTPException(status_code=401, detail="无效token")
+            uid = int(sub)
+        except (JWTError, ValueError):
             raise HTTPException(status_code=401, detail="无效token")
-        return int(sub)
-    except (JWTError, ValueError):
-        raise HTTPException(status_code=401, detail="无效token")
+        # 没有 exp 的 token 不缓存，每次都完整校验
+        exp = payload.get("exp")
+        if isinstance(exp, (int, float)) and exp > now:
+            _cache_user_id(token, uid, float(exp))
+
+    if _is_revoked(token, uid):
+        raise HTTPException(status_code=401, detail="token已失效，请重新登录")
+    return uid
@@ -1,37 +1,126 @@
+# backend/app/core/engine.py
+# 风险值进化引擎：根据完成的任务，降低对应标签的风险分
+#
+# 规则是数据（app/core/risk_rules.json，或用 RISK_RULES_PATH 指定别的文件）：
+#   关键词 -> {标签: 扣分}，一条任务可以命中多条规则、同时给多个标签扣分
+# 所有关键词编译成一个合并正则，一个任务标题只扫一遍，不再逐条 if/elif
+import json
+import os
+import re
+from dataclasses import dataclass
+from pathlib import Path
+
+RISK_RULES_PATH = os.getenv("RISK_RULES_PATH", str(Path(__file__).with_name("risk_rules.json")))
+ALL_TAGS = "*"       # 规则里写 "*" 表示给该成员的所有标签扣分
+LEVEL_RESET_SCORE = 100  # 降级后新一级的起始风险分
+
+@dataclass(frozen=True)
+class RiskRule:
+    keywords: tuple[str, ...]
+    deductions: tuple[tuple[str, int], ...]  # ((标签, 扣分), ...)
+
+class RiskRuleEngine:
+    """
+    预编译的多关键词匹配器。
+    用零宽前瞻 (?=(kw1|kw2|...)) 在每个位置取最长的关键词，关键词按长度倒序排；
+    同一位置被更长关键词“盖住”的短关键词（如 血糖仪 里的 血糖），在编译时并进长关键词的规则集合里
+    """
+
+    def __init__(self, rules: list[RiskRule]):
+        self.rules = rules
+        keyword_rules: dict[str, set[int]] = {}
+        for i, rule in enumerate(rules):
+            for kw in rule.keywords:
+                keyword_rules.setdefault(kw, set()).add(i)
+
+        # 关键词 -> 命中它就等于命中的全部规则（含它包含的更短关键词的规则）
+        self._keyword_rules = {
+            kw: frozenset().union(*(ids for other, ids in keyword_rules.items() if other in kw))
+            for kw in keyword_rules
+        }
+        keywords = sorted(keyword_rules, key=len, reverse=True)
+        self._pattern = (
+            re.compile("(?=(" + "|".join(map(re.escape, keywords)) + "))") if keywords else None
+        )
+
+    def match(self, title: str) -> set[int]:
+        """
+        返回任务标题命中的规则下标（每条规则最多算一次）
+        """
+        if not self._pattern or not title:
+            return set()
+        hit: set[int] = set()
+        for m in self._pattern.finditer(title):
+            hit |= self._keyword_rules[m.group(1)]
+        return hit
+
+    def deductions(self, title: str, tags) -> dict[str, int]:
+        """
+        一个任务标题对当前标签的扣分：{标签: 扣分}，多条规则命中同一标签时累加
+        """
+        out: dict[str, int] = {}
+        for i in sorted(self.match(title)):
+            for tag, points in self.rules[i].deductions:
+                targets = tags if tag == ALL_TAGS else ([tag] if tag in tags else [])
+                for t in targets:
+                    out[t] = out.get(t, 0) + points
+        return out
+
+    def score(self, current_tags: dict, task_titles: list[str]) -> dict:
+        """
+        把一批完成的任务按顺序作用到画像上，返回新的标签字典（不改入参）
+        """
+        tags = {tag: dict(data) for tag, data in current_tags.items()}
+        for title in task_titles:
+            for tag, points in self.deductions(title, list(tags)).items():
+                if tag in tags:
+                    apply_deduction(tags, tag, points)
+        return tags
+
+def apply_deduction(tags: dict, tag: str, points: int):
+    tag_data = tags[tag]
+    tag_data["score"] -= points
+
+    # 检查是否触发 Level 降级 (好转)
+    if tag_data["score"] <= 0:
+        if tag_data["level"] > 1:
+            # 降级：Level 2 -> Level 1
+            tag_data["level"] -= 1
+            tag_data["score"] = LEVEL_RESET_SCORE  # 开启新一级的风险消除
+        else:
+            # 已经是 Level 1 且 Score 归零 -> 痊愈！触发删除逻辑
+            del tags[tag]
+            print(f"🎉 恭喜！{tag} 已从画像中消除。")
+
+def load_rules(path: str = RISK_RULES_PATH) -> list[RiskRule]:
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return [
+        RiskRule(
+            keywords=tuple(r["keywords"]),
+            deductions=tuple((tag, int(points)) for tag, points in r["tags"].items()),
+        )
+        for r in data.get("rules", [])
+    ]
+
+risk_engine = RiskRuleEngine(load_rules())
+
+def reload_rules(path: str = RISK_RULES_PATH) -> RiskRuleEngine:
+    """
+    改了规则文件后重新编译（不用重启进程）
+    """
+    global risk_engine
+    risk_engine = RiskRuleEngine(load_rules(path))
+    return risk_engine
+
 def update_persona_risk(current_tags: dict, task_title: str) -> dict:
     """
-    风险值进化引擎：根据完成的任务，降低对应标签的风险分
-    """
-    # 1. 简单的任务分值映射逻辑 (你可以根据需求扩展)
-    score_to_deduct = 5 # 默认减5分
-    target_tag = None
-    
-    # 模拟简单的关键词匹配逻辑，判断这个任务是针对哪个标签的
-    if "血糖" in task_title:
-        target_tag = "糖尿病"
-        score_to_deduct = 15
-    elif "步行" in task_title or "运动" in task_title or "体温" in task_title:
-        target_tag = "肥胖" # 假设运动关联肥胖
-        score_to_deduct = 20
-    elif "药" in task_title:
-        # 如果是通用的吃药，可以所有标签都稍微减一点分
-        score_to_deduct = 5
-
-    # 2. 执行减分逻辑
-    if target_tag and target_tag in current_tags:
-        tag_data = current_tags[target_tag]
-        tag_data["score"] -= score_to_deduct
-        
-        # 3. 检查是否触发 Level 降级 (好转)
-        if tag_data["score"] <= 0:
-            if tag_data["level"] > 1:
-                # 降级：Level 2 -> Level 1
-                tag_data["level"] -= 1
-                tag_data["score"] = 100 # 开启新一级的风险消除
-            else:
-                # 已经是 Level 1 且 Score 归零 -> 痊愈！
-                # 触发删除逻辑
-                del current_tags[target_tag]
-                print(f"🎉 恭喜！{target_tag} 已从画像中消除。")
-                
-    return current_tags
\ No newline at end of file
+    单个任务的画像进化（老接口，等价于 score_persona_risk(current_tags, [task_title])）
+    """
+    return risk_engine.score(current_tags, [task_title])
+
+def score_persona_risk(current_tags: dict, task_titles: list[str]) -> dict:
+    """
+    批量：一次把多个完成的任务作用到同一个成员的画像上
+    """
+    return risk_engine.score(current_tags, task_titles)
@@ -0,0 +1,245 @@
+# backend/app/core/metrics.py
+# 内置指标：接口耗时、每个请求的 SQL 条数 / 耗时、AI 调用耗时和 token 用量
+# 以 Prometheus 文本格式从 /api/metrics 暴露（自带一个极简的 Counter / Histogram，不引入 prometheus_client）
+#
+# - MetricsMiddleware：纯 ASGI 中间件，按路由模板（/api/tasks/{task_id}）统计，流式响应算到最后一个字节
+# - SQL：挂在 SQLAlchemy 引擎的 before/after_cursor_execute 事件上，通过 contextvar 归到当前请求
+# - AI：llm.py 里每次调用带上函数名（chat_with_ai / summarize_session_title / generate_health_plan ...）
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from sqlalchemy import event
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+COUNT_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 50, 100)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _format_value(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if isinstance(v, float) and not v.is_integer() else str(int(v))
+
+class Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, doc: str, labelnames: tuple = ()):
+        self.name = name
+        self.doc = doc
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(labels.get(n, "") for n in self.labelnames)
+
+    @abstractmethod
+    def render(self) -> list[str]:
+        """
+        该指标的全部样本行（不含 HELP / TYPE）
+        """
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name, doc, labelnames=()):
+        super().__init__(name, doc, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, doc, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, doc, labelnames)
+        self.buckets = tuple(buckets) + (float("inf"),)
+        # key -> [每个桶的计数..., sum, count]
+        self._values: dict[tuple, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            data = self._values.get(key)
+            if data is None:
+                data = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, upper in enumerate(self.buckets):
+                if value <= upper:
+                    data[i] += 1
+                    break
+            data[-2] += value
+            data[-1] += 1
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        lines = []
+        for key, data in items:
+            cumulative = 0
+            for upper, n in zip(self.buckets, data):
+                cumulative += n
+                le = f'le="{_format_value(upper)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {data[-2]!r}")
+            lines.append(f"{self.name}_count{labels} {data[-1]}")
+        return lines
+
+REGISTRY: list[Metric] = []
+
+def render_metrics() -> str:
+    out = []
+    for m in REGISTRY:
+        out.append(f"# HELP {m.name} {m.doc}")
+        out.append(f"# TYPE {m.name} {m.kind}")
+        out.extend(m.render())
+    return "\n".join(out) + "\n"
+
+# ---------- 指标定义 ----------
+
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "接口耗时（到响应体发完）", ("method", "route", "status"),
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request", "每个请求执行的 SQL 条数", ("route",), buckets=COUNT_BUCKETS,
+)
+DB_TIME_PER_REQUEST = Histogram(
+    "db_time_per_request_seconds", "每个请求花在 SQL 上的总时间", ("route",), buckets=QUERY_BUCKETS,
+)
+DB_QUERY_LATENCY = Histogram(
+    "db_query_duration_seconds", "单条 SQL 耗时（请求外的后台任务记为 route=background）", ("route",),
+    buckets=QUERY_BUCKETS,
+)
+LLM_LATENCY = Histogram(
+    "llm_request_duration_seconds", "AI 调用耗时", ("function", "outcome"),
+)
+LLM_FIRST_TOKEN = Histogram(
+    "llm_time_to_first_token_seconds", "流式 AI 调用的首 token 耗时", ("function",),
+)
+LLM_TOKENS = Counter(
+    "llm_tokens_total", "AI 调用消耗的 token 数", ("function", "kind"),
+)
+
+# ---------- 每个请求的 SQL 统计 ----------
+
+@dataclass
+class RequestStats:
+    scope: dict
+    queries: int = 0
+    db_time: float = 0.0
+
+    @property
+    def route(self) -> str:
+        # 路由在进入 app 后才匹配上（写回同一个 scope），所以每次现取
+        return _route_of(self.scope)
+
+_request_stats: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+def current_request_stats() -> RequestStats | None:
+    return _request_stats.get()
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("metrics_query_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    stats = _request_stats.get()
+    if stats is None:
+        DB_QUERY_LATENCY.observe(elapsed, route="background")
+        return
+    stats.queries += 1
+    stats.db_time += elapsed
+    DB_QUERY_LATENCY.observe(elapsed, route=stats.route)
+
+def instrument_engine(engine):
+    """
+    给引擎挂上 SQL 计时事件（重复调用不会重复挂）
+    """
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+# ---------- 中间件 ----------
+
+def _route_of(scope) -> str:
+    """
+    用路由模板而不是真实路径做标签，避免 /api/tasks/1、/api/tasks/2 ... 各占一条时间序列。
+    新版 FastAPI 里匹配到的 route.path 不带 include_router 的 prefix（/api），按段数从真实路径补回来
+    """
+    template = getattr(scope.get("route"), "path", None)
+    if template is None:
+        return "unmatched"
+    real = scope.get("path", "")
+    extra = real.rstrip("/").count("/") - template.rstrip("/").count("/")
+    if extra > 0:
+        return "/".join(real.split("/")[:extra + 1]) + template
+    return template
+
+class MetricsMiddleware:
+    """
+    纯 ASGI 中间件（不用 BaseHTTPMiddleware），流式响应也能算到最后一个字节
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope)
+        token = _request_stats.set(stats)
+        status = {"code": 500}
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_stats.reset(token)
+            route = stats.route
+            HTTP_LATENCY.observe(
+                time.perf_counter() - start, method=scope["method"], route=route, status=status["code"],
+            )
+            DB_QUERIES_PER_REQUEST.observe(stats.queries, route=route)
+            DB_TIME_PER_REQUEST.observe(stats.db_time, route=route)
+
+# ---------- AI 调用 ----------
+
+def observe_llm(function: str, seconds: float, outcome: str, usage=None):
+    """
+    outcome: ok / error / cache_hit；usage 是 OpenAI 返回的 usage（可能为 None）
+    """
+    LLM_LATENCY.observe(seconds, function=function, outcome=outcome)
+    if usage is not None:
+        LLM_TOKENS.inc(getattr(usage, "prompt_tokens", 0) or 0, function=function, kind="prompt")
+        LLM_TOKENS.inc(getattr(usage, "completion_tokens", 0) or 0, function=function, kind="completion")
@@ -0,0 +1,98 @@
+# backend/app/core/pagination.py
+# 游标（keyset）分页：按排序键 WHERE (k1, k2) < (:v1, :v2) 翻页，不用 OFFSET，深翻页也是走索引
+#
+# 约定：
+# - before=<cursor> 取排序键更小的一页（更早的记录），after=<cursor> 取更大的一页（更新的记录）
+# - 只传 limit 不传游标：取最新的 limit 条
+# - 什么都不传：返回全部（与以前的接口行为一致）
+# - 返回体仍是列表，翻页游标放在响应头 X-Before-Cursor / X-After-Cursor / X-Has-More
+import base64
+import json
+from datetime import datetime
+
+from fastapi import HTTPException, Response
+from sqlalchemy import tuple_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+def encode_cursor(values: list) -> str:
+    raw = json.dumps(
+        [v.isoformat() if isinstance(v, datetime) else v for v in values],
+        ensure_ascii=False,
+    )
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, columns: list) -> list:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError
+        out = []
+        for col, v in zip(columns, values):
+            if col.type.python_type is datetime:
+                v = datetime.fromisoformat(v)
+            out.append(v)
+        return out
+    except Exception:
+        raise HTTPException(status_code=400, detail="无效的分页游标")
+
+def keyset_page(
+    db,
+    stmt,
+    columns: list,
+    limit: int | None,
+    before: str | None,
+    after: str | None,
+    descending: bool,
+    response: Response,
+) -> list:
+    """
+    对 stmt（已带好 WHERE 条件，不要带 ORDER BY）做游标分页。
+    columns: 排序键，最后一列必须唯一（一般是 id）
+    descending: 接口本身的展示顺序（True = 新的在前）
+    """
+    if before and after:
+        raise HTTPException(status_code=400, detail="before 和 after 不能同时使用")
+
+    key = tuple_(*columns) if len(columns) > 1 else columns[0]
+
+    def key_value(values):
+        return tuple_(*values) if len(values) > 1 else values[0]
+
+    # 老用法：不分页，整表按原顺序返回
+    if limit is None and not before and not after:
+        order = [c.desc() for c in columns] if descending else [c.asc() for c in columns]
+        return db.exec(stmt.order_by(*order)).all()
+
+    limit = min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+
+    if after:
+        # 往“更新”的方向翻：升序取
+        stmt = stmt.where(key > key_value(decode_cursor(after, columns)))
+        fetch_desc = False
+    else:
+        if before:
+            stmt = stmt.where(key < key_value(decode_cursor(before, columns)))
+        # 往“更早”的方向翻（或取最新一页）：降序取
+        fetch_desc = True
+
+    order = [c.desc() for c in columns] if fetch_desc else [c.asc() for c in columns]
+    rows = list(db.exec(stmt.order_by(*order).limit(limit + 1)).all())
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    # 翻回接口自己的展示顺序
+    if fetch_desc != descending:
+        rows.reverse()
+
+    if rows:
+        names = [c.key for c in columns]
+        first = [getattr(rows[0], n) for n in names]
+        last = [getattr(rows[-1], n) for n in names]
+        oldest, newest = (last, first) if descending else (first, last)
+        response.headers["X-Before-Cursor"] = encode_cursor(oldest)
+        response.headers["X-After-Cursor"] = encode_cursor(newest)
+    response.headers["X-Has-More"] = "1" if has_more else "0"
+    return rows
@@ -0,0 +1,69 @@
+# backend/app/core/serialization.py
+# 统一的 JSON 编解码：库里存的 list/dict 字段（tags_json / detail_json ...）和接口响应都走这里
+#
+# - 装了 orjson 就用 orjson（比标准库快一个量级，原生支持 datetime），没装自动退回标准库 json
+# - 列表接口的数据都是自己从库里读的“可信数据”，不用再过一遍 Pydantic 校验：
+#   直接拼 dict，用 json_rows() 一次编码成响应（接口上的 response_model 只留着给文档用）
+import json
+from datetime import date, datetime
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # 可选依赖
+    orjson = None
+
+def _default(obj):
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def dumps_bytes(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+def dumps(obj) -> str:
+    return dumps_bytes(obj).decode("utf-8")
+
+def loads(s: str | bytes):
+    if orjson is not None:
+        return orjson.loads(s)
+    return json.loads(s)
+
+# ---------- 库里的 JSON 字段 ----------
+
+def dump_list(v: list | None) -> str:
+    return dumps(v or [])
+
+def load_list(s: str | None) -> list:
+    try:
+        data = loads(s) if s else []
+        return data if isinstance(data, list) else []
+    except ValueError:
+        return []
+
+def load_dict(s: str | None) -> dict:
+    try:
+        data = loads(s) if s else {}
+        return data if isinstance(data, dict) else {}
+    except ValueError:
+        return {}
+
+# ---------- 响应 ----------
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        return dumps_bytes(content)
+
+def json_rows(content, response: Response | None = None, status_code: int = 200) -> FastJSONResponse:
+    """
+    把已经拼好的 dict / list 直接编码成响应，跳过 response_model 校验。
+    response：接口里注入的 Response（比如分页游标头），它上面的响应头会带过来
+    """
+    headers = dict(response.headers) if response is not None else None
+    if headers:
+        headers.pop("content-length", None)
+    return FastJSONResponse(content, status_code=status_code, headers=headers)
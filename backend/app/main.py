@@ -1,10 +1,13 @@
 # 后端入口文件，负责“启动 FastAPI + 注册中间件/路由 + 启动时初始化
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles 
 
-from .db import create_db_and_tables
+from .db import create_db_and_tables, engine
+from .core.metrics import CONTENT_TYPE, MetricsMiddleware, instrument_engine, render_metrics
+from .services.jobs import job_queue
+from .services.search import backfill_search_index
 
 from .routers import auth
 from .routers import me
@@ -12,6 +15,9 @@ from .routers import members
 from .routers import advice
 from .routers import tasks
 from .routers import consult 
+from .routers import dashboard
+from .routers import export
+from .routers import data_import
 
 
 
@@ -24,6 +30,9 @@ app.include_router(members.router, prefix="/api")
 app.include_router(advice.router, prefix="/api")
 app.include_router(tasks.router, prefix="/api")
 app.include_router(consult.router, prefix="/api")
+app.include_router(dashboard.router, prefix="/api")
+app.include_router(export.router, prefix="/api")
+app.include_router(data_import.router, prefix="/api")
 
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
@@ -34,13 +43,29 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Before-Cursor", "X-After-Cursor", "X-Has-More", "ETag"],  # 分页游标 / 列表版本
 )
 
+# 指标：接口耗时 / 每个请求的 SQL / AI 调用，见 /api/metrics
+app.add_middleware(MetricsMiddleware)
+instrument_engine(engine)
+
 @app.on_event("startup")
-def on_startup():
+async def on_startup():
     create_db_and_tables()
+    job_queue.start()
+    # 老库升级后，已有的聊天记录在后台分批补进全文索引，不耽误启动
+    job_queue.submit("search_backfill", backfill_search_index, key="search_backfill")
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    await job_queue.stop()
 
 @app.get("/api/health")
 def health():
     return {"ok": True}
 
+@app.get("/api/metrics", include_in_schema=False)
+def metrics():
+    # Prometheus 文本格式
+    return Response(render_metrics(), media_type=CONTENT_TYPE)
@@ -0,0 +1,116 @@
+# backend/app/migrations/__init__.py
+# 轻量数据库迁移：按文件名顺序执行 app/migrations/mNNNN_*.py 里的 upgrade(conn)
+# 已执行的版本记在 schema_migrations 表里，每个迁移单独一个事务。
+# create_all 只会建新表、不会改老表，所以加列 / 加索引都要写成迁移，老的 app.db 才能跟上。
+#
+# 多个 worker 同时启动时，每个迁移都在排他锁里执行、并在锁里重新确认是否已执行过：
+#   SQLite 用 BEGIN IMMEDIATE（拿到写锁才开始），Postgres 用 pg_advisory_xact_lock（事务结束自动释放）
+#
+# 新增迁移：复制一个 mNNNN_xxx.py，编号 +1，实现 upgrade(conn)，尽量写成可重复执行（幂等）的
+import importlib
+import os
+import pkgutil
+from contextlib import contextmanager
+from datetime import datetime
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+MIGRATIONS_TABLE = "schema_migrations"
+# 等别的进程跑完迁移最多等多久（秒）；大库上的数据迁移可能要跑一阵子，比平时的 busy_timeout 长得多
+MIGRATION_LOCK_TIMEOUT = int(os.getenv("MIGRATION_LOCK_TIMEOUT", "600"))
+MIGRATION_LOCK_KEY = 0x6D696772  # Postgres advisory lock 的键（任意常量，"migr"）
+
+def discover_migrations() -> list:
+    """
+    找出全部迁移模块，按编号排序
+    """
+    names = sorted(
+        m.name for m in pkgutil.iter_modules(__path__)
+        if m.name.startswith("m") and m.name[1:5].isdigit()
+    )
+    return [(name, importlib.import_module(f"{__name__}.{name}")) for name in names]
+
+def ensure_migrations_table(conn: Connection):
+    conn.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {MIGRATIONS_TABLE} ("
+        " version VARCHAR(255) PRIMARY KEY,"
+        " applied_at TIMESTAMP NOT NULL)"
+    ))
+
+def applied_versions(conn: Connection) -> set[str]:
+    rows = conn.execute(text(f"SELECT version FROM {MIGRATIONS_TABLE}")).all()
+    return {r[0] for r in rows}
+
+@contextmanager
+def migration_transaction(conn: Connection):
+    """
+    一个迁移的事务，进来时先拿到排他锁，其他进程的迁移在这里排队
+    """
+    if conn.dialect.name == "sqlite":
+        # 驱动处于 AUTOCOMMIT（见 run_migrations），事务完全由这里的 BEGIN IMMEDIATE / COMMIT 控制，
+        # DDL 也在事务里；拿不到写锁时按 busy_timeout 等
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            conn.exec_driver_sql("ROLLBACK")
+            raise
+        conn.exec_driver_sql("COMMIT")
+        return
+
+    with conn.begin():
+        if conn.dialect.name == "postgresql":
+            conn.execute(text("SELECT pg_advisory_xact_lock(:k)"), {"k": MIGRATION_LOCK_KEY})
+        yield
+
+def run_migrations(engine: Engine) -> list[str]:
+    """
+    执行所有还没跑过的迁移，返回本次执行的版本列表。
+    多进程同时调用也安全：拿到锁之后再查一次 schema_migrations，别人跑过的直接跳过
+    """
+    done = []
+    with engine.connect() as conn:
+        if conn.dialect.name == "sqlite":
+            conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+            old_timeout = conn.exec_driver_sql("PRAGMA busy_timeout").scalar()
+            conn.exec_driver_sql(f"PRAGMA busy_timeout = {MIGRATION_LOCK_TIMEOUT * 1000}")
+
+        try:
+            with migration_transaction(conn):
+                ensure_migrations_table(conn)
+
+            for name, module in discover_migrations():
+                with migration_transaction(conn):
+                    if name in applied_versions(conn):
+                        continue
+                    module.upgrade(conn)
+                    conn.execute(
+                        text(f"INSERT INTO {MIGRATIONS_TABLE} (version, applied_at) VALUES (:v, :t)"),
+                        {"v": name, "t": datetime.utcnow()},
+                    )
+                print(f"🛠️ 数据库迁移已执行: {name}")
+                done.append(name)
+        finally:
+            if conn.dialect.name == "sqlite":
+                conn.exec_driver_sql(f"PRAGMA busy_timeout = {old_timeout}")
+    return done
+
+# ---------- 迁移里常用的小工具 ----------
+
+def has_column(conn: Connection, table: str, column: str) -> bool:
+    return any(c["name"] == column for c in inspect(conn).get_columns(table))
+
+def add_column(conn: Connection, table: str, column: str, ddl: str):
+    """
+    列不存在才加，例如 add_column(conn, "taskitem", "streak", "INTEGER NOT NULL DEFAULT 0")
+    """
+    if not has_column(conn, table, column):
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+
+def create_model_indexes(conn: Connection, model):
+    """
+    把模型 __table_args__ / Field(index=True) 里声明、但库里还没有的索引补上
+    """
+    for index in model.__table__.indexes:
+        index.create(conn, checkfirst=True)
@@ -0,0 +1,7 @@
+# 手动执行迁移：在 backend/ 下运行 python -m app.migrations
+from app.db import engine
+from app.migrations import run_migrations
+
+if __name__ == "__main__":
+    done = run_migrations(engine)
+    print(f"完成，本次执行 {len(done)} 个迁移" if done else "数据库已是最新")
@@ -0,0 +1,8 @@
+# 初始表结构：等同于原来的 SQLModel.metadata.create_all
+# 新库直接建出全部表；老库只补缺的表，已存在的表不动
+from sqlmodel import SQLModel
+
+from app import models  # noqa: F401  注册所有表到 metadata
+
+def upgrade(conn):
+    SQLModel.metadata.create_all(conn)
@@ -0,0 +1,10 @@
+# 热点查询的组合索引：
+# - ChatMessage(session_id, created_at)           会话历史
+# - AdviceItem / TaskItem(user_id, member_id, id)  建议 / 任务列表
+# - ConsultSession(user_id, created_at)           会话列表
+from app.migrations import create_model_indexes
+from app.models import AdviceItem, ChatMessage, ConsultSession, TaskItem
+
+def upgrade(conn):
+    for model in (ChatMessage, AdviceItem, TaskItem, ConsultSession):
+        create_model_indexes(conn, model)
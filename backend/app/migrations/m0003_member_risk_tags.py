@@ -0,0 +1,28 @@
+# 成员风险标签拆表：MemberRiskTag(member_id, tag, level, score)
+# 并把 FamilyMember.tags_json 里已有的标签回填进来（兼容旧的列表格式 ['高血压']）
+from sqlalchemy import insert, select
+
+from app.models import FamilyMember, MemberRiskTag
+from app.services.risk_tags import load_tags, tag_rows
+
+BACKFILL_BATCH_SIZE = 1000
+
+def upgrade(conn):
+    MemberRiskTag.__table__.create(conn, checkfirst=True)
+    for index in MemberRiskTag.__table__.indexes:
+        index.create(conn, checkfirst=True)
+
+    # 已经有标签行的成员跳过，重复执行不会插重复数据
+    has_rows = select(MemberRiskTag.member_id).distinct()
+    result = conn.execute(
+        select(FamilyMember.id, FamilyMember.tags_json).where(FamilyMember.id.not_in(has_rows))
+    )
+    while True:
+        members = result.fetchmany(BACKFILL_BATCH_SIZE)
+        if not members:
+            break
+        rows = []
+        for member_id, tags_json in members:
+            rows.extend(tag_rows(member_id, load_tags(tags_json)))
+        if rows:
+            conn.execute(insert(MemberRiskTag.__table__), rows)
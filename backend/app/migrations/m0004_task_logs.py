@@ -0,0 +1,68 @@
+# 任务打卡记录拆表：TaskLog(task_id, completed_at) + TaskItem 上的打卡统计字段
+# 老数据：TaskItem.logs_json 里能解析的时间戳按顺序回放进 TaskLog 和统计字段
+import json
+from datetime import datetime
+from types import SimpleNamespace
+
+from sqlalchemy import insert, select, update
+
+from app.migrations import add_column
+from app.models import TaskItem, TaskLog
+from app.services.task_log import record_completion
+
+STAT_COLUMNS = {
+    "log_count": "INTEGER NOT NULL DEFAULT 0",
+    "last_completed_at": "DATETIME",
+    "period_index": "INTEGER NOT NULL DEFAULT -1",
+    "period_count": "INTEGER NOT NULL DEFAULT 0",
+    "completed_periods": "INTEGER NOT NULL DEFAULT 0",
+    "streak": "INTEGER NOT NULL DEFAULT 0",
+    "streak_index": "INTEGER NOT NULL DEFAULT -1",
+    "best_streak": "INTEGER NOT NULL DEFAULT 0",
+}
+
+def parse_timestamps(logs_json: str) -> list[datetime]:
+    try:
+        items = json.loads(logs_json) if logs_json else []
+    except Exception:
+        return []
+    out = []
+    for item in items if isinstance(items, list) else []:
+        try:
+            out.append(datetime.fromisoformat(str(item)))
+        except ValueError:
+            continue
+    return sorted(out)
+
+def upgrade(conn):
+    for column, ddl in STAT_COLUMNS.items():
+        add_column(conn, "taskitem", column, ddl)
+    TaskLog.__table__.create(conn, checkfirst=True)
+    for index in TaskLog.__table__.indexes:
+        index.create(conn, checkfirst=True)
+
+    # 已经有打卡记录的任务跳过，可重复执行
+    has_logs = select(TaskLog.task_id).distinct()
+    tasks = conn.execute(
+        select(TaskItem.id, TaskItem.member_id, TaskItem.freq, TaskItem.logs_json, TaskItem.done)
+        .where(TaskItem.id.not_in(has_logs), (TaskItem.logs_json.not_in(["", "[]"])) | TaskItem.done)
+    ).all()
+
+    for task_id, member_id, freq, logs_json, done in tasks:
+        stats = SimpleNamespace(freq=freq, done=False, **{
+            c: None if c == "last_completed_at" else (-1 if c.endswith("_index") else 0)
+            for c in STAT_COLUMNS
+        })
+        logged = [ts for ts in parse_timestamps(logs_json) if record_completion(stats, ts)]
+        if logged:
+            conn.execute(insert(TaskLog.__table__), [
+                {"task_id": task_id, "member_id": member_id, "completed_at": ts} for ts in logged
+            ])
+        elif done:
+            # 没有时间记录但已经完成的一次性任务
+            stats.completed_periods = 1
+        conn.execute(
+            update(TaskItem.__table__)
+            .where(TaskItem.__table__.c.id == task_id)
+            .values(**{c: getattr(stats, c) for c in STAT_COLUMNS})
+        )
@@ -0,0 +1,5 @@
+# 列表版本号表 CollectionVersion：成员 / 建议 / 任务列表的 ETag 用
+from app.models import CollectionVersion
+
+def upgrade(conn):
+    CollectionVersion.__table__.create(conn, checkfirst=True)
@@ -0,0 +1,49 @@
+# 问诊记录全文检索：ChatMessage.content / ConsultSession.title 的 FTS5 索引（trigram 分词，中文按 3 字切片）
+# - 触发器同步增删改，rowid 就是源表的 id
+# - 已有的历史数据不在迁移里一次灌完（大库会卡住启动），只记下当前最大 id，
+#   启动后由后台任务分批补建（见 app/services/search.py 的 backfill_search_index）
+# - 非 SQLite，或 SQLite 不支持 FTS5 trigram（< 3.34）时跳过，搜索自动退回 LIKE
+from sqlalchemy import insert, text
+from sqlalchemy.exc import OperationalError
+
+from app.models import SearchIndexState
+
+FTS_TABLES = {
+    "chatmessage_fts": ("chatmessage", "content"),
+    "consultsession_fts": ("consultsession", "title"),
+}
+
+def upgrade(conn):
+    SearchIndexState.__table__.create(conn, checkfirst=True)
+    if conn.dialect.name != "sqlite":
+        return
+
+    for fts, (source, column) in FTS_TABLES.items():
+        try:
+            conn.execute(text(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({column}, tokenize='trigram')"
+            ))
+        except OperationalError as e:
+            print(f"⚠️ 当前 SQLite 不支持 FTS5 trigram，跳过全文索引：{e}")
+            return
+
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {source} BEGIN "
+            f"INSERT INTO {fts}(rowid, {column}) VALUES (new.id, new.{column}); END"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {source} BEGIN "
+            f"DELETE FROM {fts} WHERE rowid = old.id; END"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {column} ON {source} BEGIN "
+            f"DELETE FROM {fts} WHERE rowid = old.id; "
+            f"INSERT INTO {fts}(rowid, {column}) VALUES (new.id, new.{column}); END"
+        ))
+
+        # 触发器建好之后才插入的行 id 一定更大，补建只管 <= target_id 的老数据
+        target = conn.execute(text(f"SELECT COALESCE(MAX(id), 0) FROM {source}")).scalar()
+        if conn.execute(
+            text("SELECT 1 FROM searchindexstate WHERE name = :n"), {"n": fts}
+        ).first() is None:
+            conn.execute(insert(SearchIndexState).values(name=fts, target_id=target, done_id=0))
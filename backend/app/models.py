@@ -3,6 +3,7 @@
 import json
 from datetime import datetime
 from typing import Optional
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field
 
 class User(SQLModel, table=True):
@@ -44,6 +45,9 @@ class FamilyMember(SQLModel, table=True):
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
 class AdviceItem(SQLModel, table=True):
+    # 列表页：WHERE user_id=? AND member_id=? ORDER BY id DESC
+    __table_args__ = (Index("ix_adviceitem_user_member_id", "user_id", "member_id", "id"),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(index=True)
     member_id: int = Field(index=True)
@@ -57,6 +61,9 @@ class AdviceItem(SQLModel, table=True):
 
 
 class TaskItem(SQLModel, table=True):
+    # 列表页：WHERE user_id=? AND member_id=? ORDER BY id DESC
+    __table_args__ = (Index("ix_taskitem_user_member_id", "user_id", "member_id", "id"),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(index=True)
     member_id: int = Field(index=True)
@@ -67,7 +74,17 @@ class TaskItem(SQLModel, table=True):
     done: bool = False
 
     detail_json: str = Field(default="[]")   # list[str]
-    logs_json: str = Field(default="[]")     # list[str] 完成记录时间戳列表（可选）
+    logs_json: str = Field(default="[]")     # 旧字段，完成记录已搬到 TaskLog 表
+
+    # 打卡统计：每次打卡增量维护，详情页不用扫 TaskLog（见 app/services/task_log.py）
+    log_count: int = 0                       # 总打卡次数
+    last_completed_at: Optional[datetime] = None
+    period_index: int = -1                   # period_count 所属的周期（天/周序号）
+    period_count: int = 0                    # 该周期内已打卡次数
+    completed_periods: int = 0               # 达标的周期数（一次性任务完成即 1）
+    streak: int = 0                          # 截至 streak_index 的连续达标周期数
+    streak_index: int = -1                   # 最近一个达标的周期
+    best_streak: int = 0
 
     created_at: datetime = Field(default_factory=datetime.utcnow) 
 
@@ -75,6 +92,9 @@ class ConsultSession(SQLModel, table=True):
     """
     问诊会话表：代表一次完整的问诊记录（比如“1月5日关于发烧的咨询”）
     """
+    # 会话列表：WHERE user_id=? ORDER BY created_at DESC
+    __table_args__ = (Index("ix_consultsession_user_created", "user_id", "created_at"),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(index=True)   # 对应 User.id
     member_id: int = Field(index=True) # 对应 FamilyMember.id 👈 指向具体的家属
@@ -85,6 +105,9 @@ class ChatMessage(SQLModel, table=True):
     """
     聊天消息表：代表会话中的一句具体的话
     """
+    # 历史记录：WHERE session_id=? ORDER BY created_at
+    __table_args__ = (Index("ix_chatmessage_session_created", "session_id", "created_at"),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
     session_id: int = Field(index=True) # 关联到哪个 ConsultSession
     
@@ -92,4 +115,61 @@ class ChatMessage(SQLModel, table=True):
     content: str # 具体的聊天内容
     
     # 记录时间
-    created_at: datetime = Field(default_factory=datetime.utcnow)       
\ No newline at end of file
+    created_at: datetime = Field(default_factory=datetime.utcnow)       
+class SessionSummary(SQLModel, table=True):
+    """
+    会话滚动摘要表：把较早的聊天压缩成一段摘要，每轮只给 AI 发“摘要 + 最近几条”
+    """
+    session_id: int = Field(primary_key=True) # 对应 ConsultSession.id，一个会话一条
+    summary: str = ""                         # 截至 upto_message_id（含）的对话摘要
+    upto_message_id: int = 0                  # 已经压进摘要的最后一条 ChatMessage.id
+
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+class MemberRiskTag(SQLModel, table=True):
+    """
+    成员风险标签表：一行一个（成员, 标签），是画像风险分的主数据。
+    FamilyMember.tags_json 作为它的镜像继续保留（拼 prompt、老代码兼容用）
+    """
+    __table_args__ = (
+        Index("ux_memberrisktag_member_tag", "member_id", "tag", unique=True),
+        # 人群查询：比如“所有 糖尿病 Level 2 的成员”
+        Index("ix_memberrisktag_tag_level", "tag", "level"),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    member_id: int           # 对应 FamilyMember.id
+    tag: str                 # 病种标签，如 糖尿病 / 高血压
+    level: int = 2           # 风险等级：2 确诊，1 好转中
+    score: int = 100         # 当前等级的剩余风险分，扣到 0 降级
+
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+class TaskLog(SQLModel, table=True):
+    """
+    任务打卡记录：一次打卡一行。周期任务（每日 / 每周）每个周期都会记
+    """
+    # 详情页最近记录：WHERE task_id=? ORDER BY completed_at DESC LIMIT n
+    __table_args__ = (Index("ix_tasklog_task_completed", "task_id", "completed_at"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    task_id: int                          # 对应 TaskItem.id
+    member_id: int = Field(index=True)    # 冗余一份，删成员时按它批量删
+    completed_at: datetime = Field(default_factory=datetime.utcnow)
+
+class CollectionVersion(SQLModel, table=True):
+    """
+    列表版本号：成员列表 / 某成员的建议、任务列表每次写入都 +1，用来生成 ETag。
+    key 形如 members:u1 / advice:u1:m3 / tasks:u1:m3（见 app/services/versions.py）
+    """
+    key: str = Field(primary_key=True)
+    version: int = 0
+
+class SearchIndexState(SQLModel, table=True):
+    """
+    全文索引（FTS5）的补建进度：老库升级时已有的行分批补进索引。
+    新写入的行由触发器实时同步，不走这里（见 app/services/search.py）
+    """
+    name: str = Field(primary_key=True)  # FTS 表名，如 chatmessage_fts
+    target_id: int = 0                   # 建索引时源表的最大 id，<= 它的行需要补建
+    done_id: int = 0                     # 已经补建到的 id
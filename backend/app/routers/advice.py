@@ -1,23 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from pydantic import BaseModel
 from sqlmodel import Session, select
-import json
 
 from ..db import get_session
 from ..core.auth import get_current_user_id
+from ..core.pagination import keyset_page, MAX_PAGE_SIZE
+from ..core.serialization import dump_list, load_list, json_rows
 from ..models import AdviceItem
+from ..services.versions import advice_key, bump_versions, collection_etag, not_modified
 
 router = APIRouter(tags=["advice"])
 
-def dump_list(v: list[str]) -> str:
-    return json.dumps(v, ensure_ascii=False)
-
-def load_list(s: str) -> list[str]:
-    try:
-        return json.loads(s) if s else []
-    except Exception:
-        return []
-
 class AdviceCreate(BaseModel):
     member_id: int
     title: str
@@ -42,26 +35,40 @@ class AdviceDetailOut(BaseModel):
 
 @router.get("/advice", response_model=list[AdviceListOut])
 def list_advice(
+    request: Request,
+    response: Response,
     member_id: int = Query(...),
+    limit: int | None = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    before: str | None = None,
+    after: str | None = None,
     session: Session = Depends(get_session),
     uid: int = Depends(get_current_user_id),
 ):
-    rows = session.exec(
-        select(AdviceItem)
-        .where(AdviceItem.user_id == uid, AdviceItem.member_id == member_id)
-        .order_by(AdviceItem.id.desc())
-    ).all()
+    # 该成员的建议没变过（版本号相同）直接 304，不查列表数据
+    cached = not_modified(request, response, collection_etag(session, advice_key(uid, member_id)))
+    if cached:
+        return cached
+
+    # 不传 limit / 游标时返回全部；否则按 id 倒序游标分页，游标见响应头
+    # 只查列表要用的列；结果是库里的可信数据，直接拼 dict 编码，不再逐行构造 Pydantic 模型
+    rows = keyset_page(
+        session,
+        select(AdviceItem.id, AdviceItem.member_id, AdviceItem.title, AdviceItem.reason, AdviceItem.tags_json)
+        .where(AdviceItem.user_id == uid, AdviceItem.member_id == member_id),
+        [AdviceItem.id],
+        limit, before, after, descending=True, response=response,
+    )
 
-    return [
-        AdviceListOut(
-            id=a.id,
-            member_id=a.member_id,
-            title=a.title,
-            reason=a.reason,
-            tags=load_list(a.tags_json),
-        )
+    return json_rows([
+        {
+            "id": a.id,
+            "member_id": a.member_id,
+            "title": a.title,
+            "reason": a.reason,
+            "tags": load_list(a.tags_json),
+        }
         for a in rows
-    ]
+    ], response)
 
 @router.get("/advice/{advice_id}", response_model=AdviceDetailOut)
 def get_advice_detail(
@@ -98,6 +105,7 @@ def create_advice(
         detail_json=dump_list(data.detail),
     )
     session.add(a)
+    bump_versions(session, advice_key(uid, data.member_id))
     session.commit()
     session.refresh(a)
 
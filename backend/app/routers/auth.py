@@ -1,10 +1,12 @@
 # backend/app/routers/auth.py
 from fastapi import APIRouter, Depends
+from fastapi.security import HTTPAuthorizationCredentials
 from sqlmodel import Session, select
 
 from ..db import get_session
 from ..models import User, FamilyMember
 from ..core.security import create_access_token
+from ..core.auth import bearer, get_current_user_id, revoke_token
 
 router = APIRouter(tags=["auth"])
 
@@ -53,3 +55,12 @@ def dev_login(session: Session = Depends(get_session)):
             "avatar_url": user.avatar_url,
         },
     }
+
+# 退出登录：吊销当前 token（在它过期前都会被拒绝，缓存里也会删掉）
+@router.post("/auth/logout")
+def logout(
+    creds: HTTPAuthorizationCredentials = Depends(bearer),
+    uid: int = Depends(get_current_user_id),
+):
+    revoke_token(creds.credentials)
+    return {"ok": True}
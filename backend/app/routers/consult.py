@@ -1,23 +1,30 @@
 # backend/app/routers/consult.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import insert
 from sqlmodel import Session, select
-from typing import List
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional
 
-import json
 import os
 
 # 导入你的数据库依赖
-from app.db import get_session
+from app.db import get_session, engine
 # 导入你的模型 (确保 models.py 里已经加了 ConsultSession 和 ChatMessage)
-from app.models import ConsultSession, ChatMessage, AdviceItem, TaskItem, FamilyMember
+from app.models import ConsultSession, ChatMessage, AdviceItem, TaskItem, CollectionVersion, FamilyMember
 from app.core.auth import get_current_user_id
-from app.services.llm import chat_with_ai, summarize_session_title, generate_health_plan
+from app.core.pagination import keyset_page, MAX_PAGE_SIZE
+from app.core.serialization import dumps, dump_list, json_rows
+from app.services.llm import chat_with_ai, stream_chat_with_ai, summarize_session_title, generate_health_plan
+from app.services.jobs import job_queue, JobQueueFull
+from app.services.history import build_history_window, load_unsummarized, compact_session_history
+from app.services.persona import get_persona_snapshot
+from app.services.versions import advice_key, bump_versions, members_key, tasks_key
+from app.services.deletion import delete_session_cascade
+from app.services.search import search_history
 
 router = APIRouter(prefix="/consult", tags=["Consult"])
 
-def dump_json(obj):
-    return json.dumps(obj, ensure_ascii=False)
-
 # --------------------------
 # 1. 创建会话 (Start)
 # --------------------------
@@ -27,6 +34,11 @@ def create_session(
     db: Session = Depends(get_session),
     uid: int = Depends(get_current_user_id) # 👈 2. 确保是从 Token 拿用户ID
 ):
+    # 只能给自己的家庭成员开会话：不然聊天时会把别人的画像（过敏 / 用药）拼进 prompt
+    member = db.get(FamilyMember, member_id)
+    if not member or member.user_id != uid:
+        raise HTTPException(status_code=404, detail="成员不存在")
+
     # 3. 创建会话时，必须把 member_id 存进去！
     session = ConsultSession(user_id=uid, member_id=member_id)
     
@@ -55,157 +67,299 @@ def create_session(
 # 2. 获取历史消息 (History)
 # --------------------------
 @router.get("/{session_id}/messages", response_model=List[ChatMessage])
-def get_messages(session_id: int, db: Session = Depends(get_session)):
+def get_messages(
+    session_id: int,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    db: Session = Depends(get_session),
+    uid: int = Depends(get_current_user_id)
+):
     """
-    加载某个会话的所有聊天记录
+    加载某个会话的聊天记录（按时间正序）
+    - 不传参数：全部记录
+    - 只传 limit：最新的 limit 条（打开问诊页用）
+    - before / after：用响应头里的游标往前翻 / 往后翻
     """
-    statement = select(ChatMessage).where(ChatMessage.session_id == session_id).order_by(ChatMessage.created_at)
-    results = db.exec(statement).all()
-    return results
+    # 只能看自己的会话（主键查询，和其他问诊接口一样返回 404）
+    session_obj = db.get(ConsultSession, session_id)
+    if not session_obj or session_obj.user_id != uid:
+        raise HTTPException(status_code=404, detail="会话不存在")
+
+    statement = select(
+        ChatMessage.id, ChatMessage.session_id, ChatMessage.role, ChatMessage.content, ChatMessage.created_at,
+    ).where(ChatMessage.session_id == session_id)
+    rows = keyset_page(
+        db, statement, [ChatMessage.created_at, ChatMessage.id],
+        limit, before, after, descending=False, response=response,
+    )
+    # 库里读出来的可信数据：直接编码，不再逐条过 response_model 校验
+    return json_rows([r._asdict() for r in rows], response)
 
 @router.get("/sessions")
 def list_sessions(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    before: Optional[str] = None,
+    after: Optional[str] = None,
     db: Session = Depends(get_session),
     uid: int = Depends(get_current_user_id)
 ):
-    # 查出当前用户所有的会话，按时间倒序排
-    statement = select(ConsultSession).where(ConsultSession.user_id == uid).order_by(ConsultSession.created_at.desc())
-    results = db.exec(statement).all()
-    return results
+    # 查出当前用户的会话，按时间倒序排（传 limit / 游标时分页）
+    statement = select(
+        ConsultSession.id, ConsultSession.user_id, ConsultSession.member_id,
+        ConsultSession.title, ConsultSession.created_at,
+    ).where(ConsultSession.user_id == uid)
+    rows = keyset_page(
+        db, statement, [ConsultSession.created_at, ConsultSession.id],
+        limit, before, after, descending=True, response=response,
+    )
+    return json_rows([r._asdict() for r in rows], response)
 
 # --------------------------
 # 3. 发送消息并获取回复 (Chat)
 # --------------------------
 
+def prepare_chat_turn(session_id: int, uid: int, content: str):
+    """
+    普通聊天和流式聊天共用的前半段：校验会话、组装画像、存用户消息、取上下文窗口。
+    同步读写数据库，异步接口里要放到线程池执行（run_in_threadpool），
+    不然等写锁（busy_timeout）的那几秒整个事件循环都会卡住
+    """
+    with Session(engine) as db:
+        # 1. 获取会话与成员画像：成员列表的版本号跟会话一条查询带回来（外连接，没改过资料时是 NULL 即 0）
+        row = db.exec(
+            select(ConsultSession, CollectionVersion.version)
+            .outerjoin(CollectionVersion, CollectionVersion.key == members_key(uid))
+            .where(ConsultSession.id == session_id)
+        ).first()
+        if not row or row[0].user_id != uid:
+            raise HTTPException(status_code=404, detail="会话不存在")
+        session_obj, members_version = row
+
+        # 画像快照按成员版本缓存，命中时不用再查 FamilyMember、也不用重新拼 prompt
+        persona = get_persona_snapshot(db, uid, session_obj.member_id, members_version or 0)
+        if not persona:
+            raise HTTPException(status_code=404, detail="成员不存在")
+
+        # 2. 存入用户消息
+        user_msg = ChatMessage(session_id=session_id, role="user", content=content)
+        db.add(user_msg)
+        db.commit()
+
+        # 3. 取上下文：滚动摘要 + 最近几条原文（更早的已压进摘要）
+        summary, payload, history_len = build_history_window(db, session_id)
+        should_title = needs_auto_title(session_obj, history_len)
+
+    # 会话在这里就关了：等 AI 的几秒里不占着数据库连接
+    return persona.chat_prompt, summary, payload, should_title
+
+def save_ai_reply(session_id: int, content: str) -> dict:
+    """
+    AI 回复入库（同步，在线程池里调用），返回存好的消息
+    """
+    with Session(engine) as db:
+        ai_msg = ChatMessage(session_id=session_id, role="assistant", content=content)
+        db.add(ai_msg)
+        db.flush()  # 拿到 id；字段都在内存里，不用 commit 后再 refresh 查一次
+        reply = ai_msg.model_dump(mode="json")
+        db.commit()
+    return reply
+
+DEFAULT_SESSION_TITLE = "新问诊会话"
+
+def needs_auto_title(session_obj: ConsultSession, history_len: int) -> bool:
+    # 规则：如果是第一轮对话，且标题还是默认的
+    return history_len <= 2 and session_obj.title == DEFAULT_SESSION_TITLE
+
+async def auto_title_session(session_id: int, content: str, ai_reply_text: str):
+    """
+    🚀 【智能起名逻辑】后台任务版：响应发出去之后再调 AI 起名，不占首轮回复的耗时。
+    自己开一个短会话写回 ConsultSession.title，前端下次拉 /consult/sessions 就能看到。
+    """
+    try:
+        # 💡 关键：找到“用户描述：”后面的真正内容
+        clean_content = content
+        if "用户描述：" in content:
+            clean_content = content.split("用户描述：")[-1] # 只取后面那段
+        
+        # 调 AI 总结标题（用干净的内容）
+        chat_summary_input = f"用户问：{clean_content}\nAI答：{ai_reply_text[:30]}"
+        new_title = await summarize_session_title(chat_summary_input)
+    except:
+        # 如果崩了，也用干净的内容截取
+        clean_content = content.split("用户描述：")[-1] if "用户描述：" in content else content
+        new_title = clean_content[:10] + "..."
+
+    await run_in_threadpool(save_auto_title, session_id, new_title)
+
+def save_auto_title(session_id: int, new_title: str):
+    with Session(engine) as db:
+        session_obj = db.get(ConsultSession, session_id)
+        # 会话可能已被删除，或者用户在此期间手动改过标题
+        if not session_obj or session_obj.title != DEFAULT_SESSION_TITLE:
+            return
+        session_obj.title = new_title
+        db.add(session_obj)
+        db.commit()
+
+def sse_event(data: dict, event: str | None = None) -> str:
+    """
+    拼一条 server-sent event（data 统一用 JSON）
+    """
+    head = f"event: {event}\n" if event else ""
+    return f"{head}data: {dumps(data)}\n\n"
+
 @router.post("/{session_id}/chat")
-def chat(
+async def chat(
     session_id: int, 
     content: str, 
-    db: Session = Depends(get_session), 
+    background_tasks: BackgroundTasks,
+    fresh: bool = False,  # True 时跳过回复缓存，强制让 AI 重新生成
     uid: int = Depends(get_current_user_id)
 ):
-    # 1. 获取会话与成员画像
-    session_obj = db.get(ConsultSession, session_id)
-    if not session_obj or session_obj.user_id != uid:
-        raise HTTPException(status_code=404, detail="会话不存在")
-
-    member = db.get(FamilyMember, session_obj.member_id)
-    persona_data = {
-        "gender": member.gender, "age": member.age, "height": member.height,
-        "weight": member.weight, "tags_json": member.tags_json,
-        "allergies": member.allergies, "meds": member.meds
-    }
-
-    # 2. 存入用户消息
-    user_msg = ChatMessage(session_id=session_id, role="user", content=content)
-    db.add(user_msg)
-    db.commit() 
-
-    # 3. 查出历史记录
-    history = db.exec(
-        select(ChatMessage).where(ChatMessage.session_id == session_id).order_by(ChatMessage.created_at)
-    ).all()
-    payload = [{"role": m.role, "content": m.content} for m in history]
+    # 数据库部分都在线程池里跑，事件循环上只 await AI 调用
+    system_prompt, summary, payload, should_title = await run_in_threadpool(
+        prepare_chat_turn, session_id, uid, content
+    )
 
     # 4. 【核心】调用 AI 聊天（这是最优先的任务）
-    ai_reply_text = chat_with_ai(payload, persona_data)
+    ai_reply_text = await chat_with_ai(payload, system_prompt, summary, use_cache=not fresh)
 
     # 5. 存入 AI 回复
-    ai_msg = ChatMessage(session_id=session_id, role="assistant", content=ai_reply_text)
-    db.add(ai_msg)
-    
-    # 6. 🚀 【智能起名逻辑】合并并保护
-    # 规则：如果是第一轮对话，且标题还是默认的
-    if len(history) <= 2 and session_obj.title == "新问诊会话":
-        try:
-            # 💡 关键：找到“用户描述：”后面的真正内容
-            clean_content = content
-            if "用户描述：" in content:
-                clean_content = content.split("用户描述：")[-1] # 只取后面那段
-            
-            # 调 AI 总结标题（用干净的内容）
-            chat_summary_input = f"用户问：{clean_content}\nAI答：{ai_reply_text[:30]}"
-            new_title = summarize_session_title(chat_summary_input)
-            session_obj.title = new_title
-        except:
-            # 如果崩了，也用干净的内容截取
-            clean_content = content.split("用户描述：")[-1] if "用户描述：" in content else content
-            session_obj.title = clean_content[:10] + "..."
-        
-        db.add(session_obj)
+    reply = await run_in_threadpool(save_ai_reply, session_id, ai_reply_text)
 
-    # 7. 最后统一提交所有更改
-    db.commit()
-    db.refresh(ai_msg)
+    # 6. 第一轮对话自动起名、旧消息压进摘要：都放到响应之后的后台任务里
+    if should_title:
+        background_tasks.add_task(auto_title_session, session_id, content, ai_reply_text)
+    background_tasks.add_task(compact_session_history, session_id)
 
-    return ai_msg
-    
-@router.post("/{session_id}/generate_plan")
-def generate_plan(
+    return reply
+
+@router.post("/{session_id}/chat/stream")
+async def chat_stream(
     session_id: int, 
-    db: Session = Depends(get_session), 
+    content: str, 
+    background_tasks: BackgroundTasks,
+    fresh: bool = False,  # True 时跳过回复缓存，强制让 AI 重新生成
     uid: int = Depends(get_current_user_id)
 ):
-    # 1. 验证会话权限并获取 member_id
-    session_obj = db.get(ConsultSession, session_id)
-    if not session_obj or session_obj.user_id != uid:
-        raise HTTPException(status_code=404, detail="会话不存在")
+    """
+    流式聊天（SSE）：
+    - 每收到一段 token 就推一条 `data: {"delta": "..."}`
+    - 生成结束后把完整回复一次性入库，再推一条 `event: done`，data 是存好的 ChatMessage
+    - 第一轮对话的自动起名、摘要压缩在流结束后由后台任务完成
+    """
+    system_prompt, summary, payload, should_title = await run_in_threadpool(
+        prepare_chat_turn, session_id, uid, content
+    )
 
-    # 2. 获取该成员的画像和所有聊天记录
-    member = db.get(FamilyMember, session_obj.member_id)
-    history_rows = db.exec(
-        select(ChatMessage).where(ChatMessage.session_id == session_id).order_by(ChatMessage.created_at)
-    ).all()
-    history_payload = [{"role": m.role, "content": m.content} for m in history_rows]
-
-    # 3. 🚀 调用 AI 生成全案 (调用我们刚才写好的 llm 函数)
-    # 传入简要画像，让建议更精准
-    persona_brief = {
-        "age": member.age, 
-        "gender": member.gender, 
-        "tags": member.tags_json, 
-        "allergies": member.allergies
-    }
-    ai_plan = generate_health_plan(history_payload, persona_brief)
+    async def event_stream():
+        parts = []
+        async for delta in stream_chat_with_ai(payload, system_prompt, summary, use_cache=not fresh):
+            parts.append(delta)
+            yield sse_event({"delta": delta})
+
+        ai_reply_text = "".join(parts)
+
+        # 流结束后一次性入库（线程池里开短会话写）
+        done_data = await run_in_threadpool(save_ai_reply, session_id, ai_reply_text)
+        yield sse_event(done_data, event="done")
+
+        # 流结束后再起名、压缩摘要（后台任务在响应发完后执行）
+        if should_title:
+            background_tasks.add_task(auto_title_session, session_id, content, ai_reply_text)
+        background_tasks.add_task(compact_session_history, session_id)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+    
+def load_plan_context(session_id: int, uid: int):
+    """
+    生成方案前读库：成员画像 + 聊天记录（已压进摘要的部分用摘要代替），返回 (画像快照, 对话 payload)
+    """
+    with Session(engine) as db:
+        session_obj = db.get(ConsultSession, session_id)
+        if not session_obj or session_obj.user_id != uid:
+            raise ValueError("会话不存在")
+
+        persona = get_persona_snapshot(db, uid, session_obj.member_id)
+        if not persona:
+            raise ValueError("成员不存在")
+
+        summary, history_rows = load_unsummarized(db, session_id)
+        history_payload = [{"role": m.role, "content": m.content} for m in history_rows]
+        if summary:
+            history_payload.insert(0, {"role": "system", "content": f"此前对话摘要：{summary}"})
+    return persona, history_payload
+
+def save_plan(uid: int, member_id: int, advice_rows: list[dict], task_rows: list[dict]):
+    """
+    每张表一条 executemany，最后一次性提交
+    """
+    with Session(engine) as db:
+        if advice_rows:
+            db.exec(insert(AdviceItem), params=advice_rows)
+        if task_rows:
+            db.exec(insert(TaskItem), params=task_rows)
+        bump_versions(
+            db,
+            *([advice_key(uid, member_id)] if advice_rows else []),
+            *([tasks_key(uid, member_id)] if task_rows else []),
+        )
+        db.commit()
+
+async def run_generate_plan(session_id: int, uid: int) -> dict:
+    """
+    生成方案的实际工作（在后台任务队列里跑）：读记录 -> 调 AI -> 批量存建议和任务
+    读写库都放到线程池，事件循环上只等 AI
+    """
+    # 1. 获取该成员的画像和所有聊天记录
+    persona, history_payload = await run_in_threadpool(load_plan_context, session_id, uid)
+    member_id = persona.member_id
+
+    # 2. 🚀 调用 AI 生成全案 (调用我们刚才写好的 llm 函数)
+    # 传入简要画像（来自快照缓存），让建议更精准
+    ai_plan = await generate_health_plan(history_payload, persona.brief)
 
-    # 4. 【核心存库逻辑】提取 AI 吐出来的结构化数据
+    # 3. 【核心存库逻辑】提取 AI 吐出来的结构化数据
     new_advices = ai_plan.get("new_advice", [])
     new_tasks = ai_plan.get("new_tasks", [])
 
-    # A. 遍历保存建议
-    for item in new_advices:
-        # 这里做了个简单的类型保护，防止 AI 返回纯字符串
-        title = item.get("title") if isinstance(item, dict) else str(item)
-        reason = item.get("reason", "根据本次问诊生成") if isinstance(item, dict) else ""
-        
-        advice = AdviceItem(
-            user_id=uid,
-            member_id=member.id,
-            title=title,
-            reason=reason,
-            tags_json=json.dumps(item.get("tags", []) if isinstance(item, dict) else []),
-            detail_json="[]"
-        )
-        db.add(advice)
+    # A. 整理建议（这里做了个简单的类型保护，防止 AI 返回纯字符串）
+    advice_rows = [
+        {
+            "user_id": uid,
+            "member_id": member_id,
+            "title": item.get("title") if isinstance(item, dict) else str(item),
+            "reason": item.get("reason", "根据本次问诊生成") if isinstance(item, dict) else "",
+            "tags_json": dump_list(item.get("tags", []) if isinstance(item, dict) else []),
+            "detail_json": "[]",
+        }
+        for item in new_advices
+    ]
 
-    # B. 遍历保存任务
-    for item in new_tasks:
-        t_title = item.get("title") if isinstance(item, dict) else str(item)
-        
-        task = TaskItem(
-            user_id=uid,
-            member_id=member.id,
-            title=t_title,
-            freq=item.get("freq", "由医生建议") if isinstance(item, dict) else "",
-            due=item.get("due", "尽快开始") if isinstance(item, dict) else "",
-            done=False,
-            detail_json="[]",
-            logs_json="[]"
-        )
-        db.add(task)
+    # B. 整理任务
+    task_rows = [
+        {
+            "user_id": uid,
+            "member_id": member_id,
+            "title": item.get("title") if isinstance(item, dict) else str(item),
+            "freq": item.get("freq", "由医生建议") if isinstance(item, dict) else "",
+            "due": item.get("due", "尽快开始") if isinstance(item, dict) else "",
+            "done": False,
+            "detail_json": "[]",
+            "logs_json": "[]",
+        }
+        for item in new_tasks
+    ]
 
-    # 5. 最后一次性提交
-    db.commit()
+    # 4. 存库
+    await run_in_threadpool(save_plan, uid, member_id, advice_rows, task_rows)
 
     return {
         "ok": True, 
@@ -214,47 +368,85 @@ def generate_plan(
         "count_tasks": len(new_tasks)
     }
 
+def check_session_owner(session_id: int, uid: int):
+    with Session(engine) as db:
+        session_obj = db.get(ConsultSession, session_id)
+        if not session_obj or session_obj.user_id != uid:
+            raise HTTPException(status_code=404, detail="会话不存在")
+
+@router.post("/{session_id}/generate_plan")
+async def generate_plan(
+    session_id: int, 
+    uid: int = Depends(get_current_user_id)
+):
+    """
+    提交“生成方案”后台任务，立刻返回 job_id；结果通过 GET /consult/jobs/{job_id} 轮询。
+    同一个会话的方案还在生成时重复点击，会拿到同一个 job_id。
+    """
+    # 1. 验证会话权限（线程池里查，查完就归还连接）
+    await run_in_threadpool(check_session_owner, session_id, uid)
+
+    # 2. 丢进任务队列
+    try:
+        job = job_queue.submit(
+            "generate_plan",
+            run_generate_plan,
+            session_id,
+            uid,
+            key=f"generate_plan:{session_id}",
+            owner_id=uid,
+        )
+    except JobQueueFull:
+        raise HTTPException(status_code=503, detail="方案生成排队已满，请稍后再试")
+
+    return {"ok": True, "job_id": job.id, "status": job.status}
+
+# --------------------------
+# 搜索问诊记录（会话标题 + 聊天内容）
+# --------------------------
+@router.get("/search")
+def search_consult_history(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(20, ge=1, le=50),
+    offset: int = Query(0, ge=0, le=1000),
+    db: Session = Depends(get_session),
+    uid: int = Depends(get_current_user_id)
+):
+    """
+    只搜当前用户自己的会话；按相关度排序，offset 翻页，还有下一页时 X-Has-More: 1
+    """
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="搜索词不能为空")
+    hits, has_more = search_history(db, uid, q, limit, offset)
+    response.headers["X-Has-More"] = "1" if has_more else "0"
+    return json_rows(hits, response)
+
+@router.get("/jobs/{job_id}")
+def get_job(
+    job_id: str,
+    uid: int = Depends(get_current_user_id)
+):
+    job = job_queue.get(job_id)
+    if not job or job.owner_id != uid:
+        raise HTTPException(status_code=404, detail="任务不存在")
+    return job.to_dict()
+
 @router.delete("/sessions/{session_id}")
 def delete_session(
     session_id: int,
     db: Session = Depends(get_session),
     uid: int = Depends(get_current_user_id)
 ):
-    # 🕵️‍♂️ 监控器 1：看后端到底在读哪里的数据库文件
-    from app.db import engine
-    db_url = str(engine.url)
-    print(f"\n🚀 [DEBUG START] 开始尝试删除会话...")
-    print(f"📂 后端正在连接的数据库: {db_url}")
-    
-    # 1. 查找该会话
+    # 1. 查找该会话 + 权限检查
     session_obj = db.get(ConsultSession, session_id)
-    
-    # 🕵️‍♂️ 监控器 2：看查找结果
     if session_obj is None:
-        print(f"❌ [FAIL] 数据库里没找到 ID 为 {session_id} 的记录！")
-        # 💡 这里我们返回 404，不返回 200，让前端报错
-        raise HTTPException(status_code=404, detail=f"数据库文件中没有 ID {session_id}，请检查文件路径是否正确")
-
-    print(f"🔍 [SUCCESS] 找到了会话：ID={session_obj.id}, 标题='{session_obj.title}'")
-
-    # 权限检查
+        raise HTTPException(status_code=404, detail="会话不存在")
     if session_obj.user_id != uid:
-        print(f"🚫 [DENIED] 权限不足：会话归属用户 {session_obj.user_id}，当前用户 {uid}")
         raise HTTPException(status_code=403, detail="无权删除此记录")
 
-    # 3. 删掉关联的聊天消息
-    statement = select(ChatMessage).where(ChatMessage.session_id == session_id)
-    messages = db.exec(statement).all()
-    print(f"🗑️ [PREPARE] 正在标记删除关联的 {len(messages)} 条聊天记录...")
-    for msg in messages:
-        db.delete(msg)
+    # 2. 批量删掉消息、摘要和会话本体（DELETE ... WHERE，不把消息读进内存），一次提交
+    delete_session_cascade(db, session_id)
+    db.commit()
 
-    # 4. 删掉会话本体
-    db.delete(session_obj)
-    
-    # 5. 【临门一脚】提交
-    print(f"💾 [ACTION] 执行 db.commit() ...")
-    db.commit() 
-    
-    print(f"✅ [DONE] 删除操作已提交到硬盘！\n")
     return {"ok": True, "msg": "删除成功"}
\ No newline at end of file
@@ -0,0 +1,172 @@
+# backend/app/routers/dashboard.py
+# 首页看板：一次请求返回全部成员 + 各自的风险标签、待办任务、最新建议
+# SQL 条数固定（成员 1 条，标签 / 任务 / 建议各 1 条 member_id IN (...) 查询），跟成员个数无关
+#
+# fields 选字段（逗号分隔），响应里只带页面用得到的部分，没选的部分连查询都省掉：
+#   fields=name,tags                      只要成员名和标签（不查任务、建议）
+#   fields=name,tasks.title,advice        成员名 + 待办任务标题 + 建议全部字段
+# 不传 fields 返回全部；成员 / 任务 / 建议的 id 总是带上
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func
+from sqlmodel import Session, select
+
+from ..db import get_session
+from ..core.auth import get_current_user_id
+from ..core.serialization import json_rows, load_list
+from ..models import AdviceItem, FamilyMember, TaskItem
+from ..services.risk_tags import load_member_tags
+from ..services.task_log import is_done
+
+router = APIRouter(tags=["dashboard"])
+
+DASHBOARD_TASK_LIMIT = 20    # 每个成员默认最多返回几条待办任务
+DASHBOARD_ADVICE_LIMIT = 3   # 每个成员默认返回最新几条建议
+
+MEMBER_FIELDS = {
+    "id": FamilyMember.id,
+    "name": FamilyMember.name,
+    "relation": FamilyMember.relation,
+    "gender": FamilyMember.gender,
+    "age": FamilyMember.age,
+    "height": FamilyMember.height,
+    "weight": FamilyMember.weight,
+    "allergies": FamilyMember.allergies,
+    "meds": FamilyMember.meds,
+    "notes": FamilyMember.notes,
+}
+TASK_FIELDS = {
+    "id": TaskItem.id,
+    "title": TaskItem.title,
+    "freq": TaskItem.freq,
+    "due": TaskItem.due,
+}
+ADVICE_FIELDS = {
+    "id": AdviceItem.id,
+    "title": AdviceItem.title,
+    "reason": AdviceItem.reason,
+    "tags": AdviceItem.tags_json,
+    "created_at": AdviceItem.created_at,
+}
+
+def parse_fields(fields: str | None) -> tuple[list[str], bool, list[str] | None, list[str] | None]:
+    """
+    fields -> (成员字段, 要不要标签, 任务字段, 建议字段)；任务 / 建议为 None 表示不要这一块
+    """
+    if not fields:
+        return list(MEMBER_FIELDS), True, list(TASK_FIELDS), list(ADVICE_FIELDS)
+
+    member, tasks, advice = ["id"], None, None
+    want_tags = False
+    sections = {"tasks": TASK_FIELDS, "advice": ADVICE_FIELDS}
+    picked: dict[str, list[str]] = {}
+
+    for name in filter(None, (f.strip() for f in fields.split(","))):
+        section, _, sub = name.partition(".")
+        if section in sections:
+            cols = picked.setdefault(section, ["id"])
+            if not sub:
+                cols.extend(sections[section])
+            elif sub in sections[section]:
+                cols.append(sub)
+            else:
+                raise HTTPException(status_code=400, detail=f"未知字段：{name}")
+        elif name == "tags":
+            want_tags = True
+        elif name in MEMBER_FIELDS:
+            member.append(name)
+        else:
+            raise HTTPException(status_code=400, detail=f"未知字段：{name}")
+
+    if "tasks" in picked:
+        tasks = list(dict.fromkeys(picked["tasks"]))
+    if "advice" in picked:
+        advice = list(dict.fromkeys(picked["advice"]))
+    return list(dict.fromkeys(member)), want_tags, tasks, advice
+
+def load_pending_tasks(
+    session: Session, uid: int, member_ids: list[int], fields: list[str], limit: int,
+) -> dict[int, list[dict]]:
+    """
+    各成员未完成的任务（新的在前），一条 IN 查询。
+    周期任务的 done 不落库，先按 done == False 粗筛，本周期是否达标在内存里判断
+    """
+    rows = session.exec(
+        select(
+            TaskItem.member_id, TaskItem.freq, TaskItem.done, TaskItem.period_index, TaskItem.period_count,
+            *(TASK_FIELDS[f] for f in fields if f != "freq"),  # freq 判断完成状态本来就要查
+        )
+        .where(TaskItem.user_id == uid, TaskItem.member_id.in_(member_ids), TaskItem.done == False)  # noqa: E712
+        .order_by(TaskItem.member_id, TaskItem.id.desc())
+    ).all()
+
+    now = datetime.utcnow()
+    out: dict[int, list[dict]] = {mid: [] for mid in member_ids}
+    for t in rows:
+        pending = out[t.member_id]
+        if len(pending) >= limit or is_done(t, now):
+            continue
+        pending.append({f: getattr(t, f) for f in fields})
+    return out
+
+def load_latest_advice(
+    session: Session, uid: int, member_ids: list[int], fields: list[str], limit: int,
+) -> dict[int, list[dict]]:
+    """
+    各成员最新的 limit 条建议：ROW_NUMBER() 按成员分组取前几条，一条查询，不会把全部历史读出来
+    """
+    rn = func.row_number().over(partition_by=AdviceItem.member_id, order_by=AdviceItem.id.desc()).label("rn")
+    ranked = (
+        select(AdviceItem.member_id, *(ADVICE_FIELDS[f].label(f) for f in fields), rn)
+        .where(AdviceItem.user_id == uid, AdviceItem.member_id.in_(member_ids))
+        .subquery()
+    )
+    rows = session.exec(
+        select(*ranked.c).where(ranked.c.rn <= limit).order_by(ranked.c.member_id, ranked.c.rn)
+    ).all()
+
+    out: dict[int, list[dict]] = {mid: [] for mid in member_ids}
+    for a in rows:
+        item = {f: getattr(a, f) for f in fields}
+        if "tags" in item:
+            item["tags"] = load_list(item["tags"])
+        out[a.member_id].append(item)
+    return out
+
+@router.get("/dashboard")
+def get_dashboard(
+    fields: str | None = Query(None, description="逗号分隔，如 name,tags,tasks.title,advice"),
+    task_limit: int = Query(DASHBOARD_TASK_LIMIT, ge=1, le=100),
+    advice_limit: int = Query(DASHBOARD_ADVICE_LIMIT, ge=1, le=20),
+    session: Session = Depends(get_session),
+    uid: int = Depends(get_current_user_id),
+):
+    member_fields, want_tags, task_fields, advice_fields = parse_fields(fields)
+
+    rows = session.exec(
+        select(*(MEMBER_FIELDS[f] for f in member_fields))
+        .where(FamilyMember.user_id == uid)
+        .order_by(FamilyMember.id.desc())
+    ).all()
+    if len(member_fields) == 1:  # 只查一列时 exec 返回的是标量
+        rows = [(r,) for r in rows]
+    members = [dict(zip(member_fields, r)) for r in rows]
+    member_ids = [m["id"] for m in members]
+
+    # 没有成员就不用再查了；有的话每块一条 IN 查询
+    if member_ids:
+        if want_tags:
+            tags_by_member = load_member_tags(session, member_ids)
+            for m in members:
+                m["tags"] = tags_by_member[m["id"]]
+        if task_fields is not None:
+            tasks_by_member = load_pending_tasks(session, uid, member_ids, task_fields, task_limit)
+            for m in members:
+                m["tasks"] = tasks_by_member[m["id"]]
+        if advice_fields is not None:
+            advice_by_member = load_latest_advice(session, uid, member_ids, advice_fields, advice_limit)
+            for m in members:
+                m["advice"] = advice_by_member[m["id"]]
+
+    return json_rows({"members": members})
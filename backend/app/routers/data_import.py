@@ -0,0 +1,30 @@
+# backend/app/routers/data_import.py
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Query, Request
+from starlette.concurrency import run_in_threadpool
+
+from ..core.auth import get_current_user_id
+from ..services.bulk_import import BulkImporter, ImportFormatError, iter_records
+
+router = APIRouter(tags=["import"])
+
+# 批量导入成员 / 建议 / 任务：请求体是 NDJSON 或 JSON 数组（格式见 app/services/bulk_import.py）
+# 边读边写，每 IMPORT_CHUNK_SIZE 条一个事务；返回每类写入条数和行级错误
+@router.post("/import")
+async def bulk_import(
+    request: Request,
+    record_type: Literal["member", "advice", "task"] | None = Query(None, alias="type"),
+    uid: int = Depends(get_current_user_id),
+):
+    # 读库 / 写库都是同步的，丢到线程池跑，不卡事件循环；读请求体的 await 期间不占连接
+    importer = await run_in_threadpool(BulkImporter, uid, record_type)
+    try:
+        async for row, record in iter_records(request.stream()):
+            if importer.add(row, record):
+                await run_in_threadpool(importer.flush)
+    except ImportFormatError as e:
+        # JSON 数组坏了没法继续往后解析：之前的照常写入，报告里标明在哪停下
+        importer.result.aborted = str(e)
+    await run_in_threadpool(importer.flush)
+    return importer.result.to_dict()
@@ -0,0 +1,24 @@
+# backend/app/routers/export.py
+from datetime import datetime
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+
+from ..core.auth import get_current_user_id
+from ..services.export import stream_export
+
+router = APIRouter(tags=["export"])
+
+# 导出全部健康档案（NDJSON，一行一条记录）；gzip=true 时下载 .ndjson.gz
+@router.get("/export")
+def export_health_record(
+    gzip: bool = False,
+    uid: int = Depends(get_current_user_id),
+):
+    # 不用 get_session：生成器自己开连接，边查边写，响应发完才关
+    filename = f"health_export_{datetime.utcnow():%Y%m%d}.ndjson" + (".gz" if gzip else "")
+    return StreamingResponse(
+        stream_export(uid, gzip=gzip),
+        media_type="application/gzip" if gzip else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -1,11 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from pydantic import BaseModel
 from sqlmodel import Session, select
-import json
 
 from ..db import get_session
 from ..models import FamilyMember
 from ..core.auth import get_current_user_id
+from ..core.serialization import json_rows
+from ..services.deletion import delete_member_cascade, delete_member_children, purge_member_data
+from ..services.jobs import job_queue, JobQueueFull
+from ..services.risk_tags import add_member_tags, dump_tags, load_member_tags, normalize_tags, set_member_tags
+from ..services.versions import (
+    advice_key, bump_versions, collection_etag, member_keys, members_key, not_modified, tasks_key,
+)
 
 router = APIRouter(tags=["members"])
 
@@ -47,56 +53,31 @@ class MemberOut(BaseModel):
     meds: str | None = None      # 🆕
     notes: str | None = None
 
-def dump_tags(tags: list[str]) -> str:
-    # 如果前端传的是原来的列表格式 ['高血压', '肥胖']
-    if isinstance(tags, list):
-        # 自动为每个标签初始化：Level 2 (确诊), Score 100 (起始风险满分)
-        structured_data = {
-            tag: {"level": 2, "score": 100} for tag in tags
-        }
-        return json.dumps(structured_data, ensure_ascii=False)
-    
-    # 如果已经是字典格式了，直接存
-    return json.dumps(tags, ensure_ascii=False)
-
-def load_tags(s: str) -> list[str]:
-    try:
-        data = json.loads(s) if s else {}
-        
-        # 核心兼容逻辑：如果读出来还是旧的列表格式 ['高血压']
-        if isinstance(data, list):
-            # 瞬间把它升级为新格式返回给前端
-            return {tag: {"level": 2, "score": 100} for tag in data}
-            
-        return data
-    except Exception:
-        return {}
-
 @router.get("/members", response_model=list[MemberOut])
 def list_members(
+    request: Request,
+    response: Response,
     session: Session = Depends(get_session),
     uid: int = Depends(get_current_user_id),
 ):
+    # 列表没变（版本号相同）直接 304，不查成员和标签
+    cached = not_modified(request, response, collection_etag(session, members_key(uid)))
+    if cached:
+        return cached
+
     rows = session.exec(
-        select(FamilyMember).where(FamilyMember.user_id == uid).order_by(FamilyMember.id.desc())
+        select(
+            FamilyMember.id, FamilyMember.name, FamilyMember.relation, FamilyMember.gender,
+            FamilyMember.age, FamilyMember.height, FamilyMember.weight,
+            FamilyMember.allergies, FamilyMember.meds, FamilyMember.notes,
+        ).where(FamilyMember.user_id == uid).order_by(FamilyMember.id.desc())
     ).all()
 
-    return [
-        MemberOut(
-            id=m.id,
-            name=m.name,
-            relation=m.relation,
-            gender=m.gender,
-            age=m.age,
-            height=m.height,   # 🆕 记得加上这几行
-            weight=m.weight,   # 🆕
-            allergies=m.allergies, # 🆕
-            meds=m.meds,       # 🆕
-            notes=m.notes,
-            tags=load_tags(m.tags_json),
-        )
-        for m in rows
-    ]
+    # 标签从 MemberRiskTag 一次 IN 查询取出，不再逐个解析 tags_json
+    tags_by_member = load_member_tags(session, [m.id for m in rows])
+
+    # 可信数据直接拼 dict 编码，跳过 MemberOut 逐个校验
+    return json_rows([{**m._asdict(), "tags": tags_by_member[m.id]} for m in rows], response)
 
 @router.post("/members", response_model=MemberOut)
 def create_member(
@@ -104,6 +85,7 @@ def create_member(
     session: Session = Depends(get_session),
     uid: int = Depends(get_current_user_id),
 ):
+    tags = normalize_tags(data.tags)
     m = FamilyMember(
         user_id=uid,
         name=data.name,
@@ -115,13 +97,15 @@ def create_member(
         allergies=data.allergies, # 🆕
         meds=data.meds,       # 🆕
         notes=data.notes,
-        tags_json=dump_tags(data.tags),
+        tags_json=dump_tags(tags),
     )
     session.add(m)
-    session.commit()
-    session.refresh(m)
+    session.flush()  # 先拿到 id，标签行要用
+    add_member_tags(session, m.id, tags)
+    bump_versions(session, members_key(uid))
 
-    return MemberOut(
+    # 字段都在内存里，提交前拼好返回值，省掉 commit 后 refresh 的那次查询
+    out = MemberOut(
         id=m.id,
         name=m.name,
         relation=m.relation,
@@ -132,8 +116,10 @@ def create_member(
         allergies=m.allergies, # 🆕
         meds=m.meds,       # 🆕
         notes=m.notes,
-        tags=load_tags(m.tags_json),
+        tags=tags,
     )
+    session.commit()
+    return out
 
 # 更新成员信息
 @router.put("/members/{member_id}")
@@ -149,32 +135,63 @@ def update_member(
 
     update_data = data.model_dump(exclude_unset=True)
     
-    # 特殊处理 tags -> tags_json
+    # 特殊处理 tags -> MemberRiskTag（同时同步 tags_json）
     if "tags" in update_data:
-        member.tags_json = dump_tags(update_data.pop("tags"))
+        set_member_tags(session, member, update_data.pop("tags"))
         
     for k, v in update_data.items():
         setattr(member, k, v)
         
     session.add(member)
+    bump_versions(session, members_key(uid))
     session.commit()
     return {"ok": True}
 
 # 删除成员
 @router.delete("/members/{member_id}")
-def delete_member(member_id: int, session: Session = Depends(get_session)):
-    # 1. 直接按 ID 找人
+def delete_member(
+    member_id: int,
+    background: bool = False,  # True：先删成员，名下的大量历史数据交给后台分批清理
+    session: Session = Depends(get_session),
+    uid: int = Depends(get_current_user_id),
+):
+    # 同步接口：在线程池里跑，批量 DELETE（连带全文索引触发器）再慢也不卡事件循环
+    # 1. 按 ID 找人，并确认是自己的家庭成员
     member = session.get(FamilyMember, member_id)
     
-    if not member:
+    if not member or member.user_id != uid:
         raise HTTPException(status_code=404, detail="找不到该成员")
 
     # 2. 【核心逻辑】只看关系，如果是本人，直接拦截
     if member.relation == "本人":
         raise HTTPException(status_code=400, detail="本人账号无法删除")
 
-    # 3. 其他的一律删除
+    # 3. 连同会话、消息、建议、任务一起删（批量 DELETE，一个事务）
+    if not background:
+        delete_member_cascade(session, member_id)
+        bump_versions(session, *member_keys(uid, member_id))
+        session.commit()
+        return {"ok": True}
+
+    # 4. 后台模式：先把成员本身删掉并提交，再排清理任务（保证清理开始时成员已经不在了）
     session.delete(member)
+    bump_versions(session, *member_keys(uid, member_id))
     session.commit()
-    
-    return {"ok": True}
\ No newline at end of file
+
+    try:
+        job = job_queue.submit(
+            "purge_member",
+            purge_member_data,
+            member_id,
+            uid,
+            key=f"purge_member:{member_id}",
+            owner_id=uid,
+        )
+    except JobQueueFull:
+        # 排不上队就当场删完（这里本来就在线程池里），不留下没人清理的数据
+        delete_member_children(session, member_id)
+        bump_versions(session, advice_key(uid, member_id), tasks_key(uid, member_id))
+        session.commit()
+        return {"ok": True}
+
+    return {"ok": True, "job_id": job.id}
@@ -1,24 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from pydantic import BaseModel, Field
+from sqlalchemy import insert, update
 from sqlmodel import Session, select
-import json
+from datetime import datetime
 
 from ..db import get_session
 from ..core.auth import get_current_user_id
-from ..models import TaskItem, FamilyMember 
-from app.core.engine import update_persona_risk 
-from app.routers.members import load_tags, dump_tags
+from ..core.pagination import keyset_page, MAX_PAGE_SIZE
+from ..core.serialization import dump_list, load_list, json_rows
+from ..models import TaskItem, TaskLog, FamilyMember
+from app.core.engine import score_persona_risk
+from app.services.risk_tags import load_member_tags, set_member_tags
+from app.services.task_log import complete_recurring, is_done, parse_freq, recent_logs, task_stats
+from app.services.versions import bump_versions, members_key, not_modified, tasks_etag, tasks_key
 
 router = APIRouter(tags=["tasks"])
 
-def dump_list(v: list[str]) -> str:
-    return json.dumps(v, ensure_ascii=False)
-
-def load_list(s: str) -> list[str]:
-    try:
-        return json.loads(s) if s else []
-    except Exception:
-        return []
+MAX_BATCH_COMPLETE = 200  # 批量打卡一次最多的任务数
 
 class TaskCreate(BaseModel):
     member_id: int
@@ -43,31 +41,54 @@ class TaskDetailOut(BaseModel):
     due: str
     done: bool
     detail: list[str]
-    logs: list[str]
+    logs: list[str]                # 最近几条打卡时间
+    streak: int = 0                # 当前连续达标周期数（天 / 周）
+    best_streak: int = 0
+    log_count: int = 0             # 总打卡次数
+    period_count: int = 0          # 本周期已打卡次数
+    period_times: int = 1          # 本周期需要打卡次数
+    adherence: float = 0.0         # 达标率
 
 @router.get("/tasks", response_model=list[TaskListOut])
 def list_tasks(
+    request: Request,
+    response: Response,
     member_id: int = Query(...),
+    limit: int | None = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    before: str | None = None,
+    after: str | None = None,
     session: Session = Depends(get_session),
     uid: int = Depends(get_current_user_id),
 ):
-    rows = session.exec(
-        select(TaskItem)
-        .where(TaskItem.user_id == uid, TaskItem.member_id == member_id)
-        .order_by(TaskItem.id.desc())
-    ).all()
+    # 该成员的任务没变过、也没跨天（版本号和日期都相同）直接 304，不查列表数据
+    cached = not_modified(request, response, tasks_etag(session, uid, member_id))
+    if cached:
+        return cached
 
-    return [
-        TaskListOut(
-            id=t.id,
-            member_id=t.member_id,
-            title=t.title,
-            freq=t.freq,
-            due=t.due,
-            done=t.done,
-        )
+    # 不传 limit / 游标时返回全部；否则按 id 倒序游标分页，游标见响应头
+    # 只查列表要用的列（含算“本周期是否完成”的统计列），直接拼 dict 编码，跳过 Pydantic 校验
+    rows = keyset_page(
+        session,
+        select(
+            TaskItem.id, TaskItem.member_id, TaskItem.title, TaskItem.freq, TaskItem.due,
+            TaskItem.done, TaskItem.period_index, TaskItem.period_count,
+        ).where(TaskItem.user_id == uid, TaskItem.member_id == member_id),
+        [TaskItem.id],
+        limit, before, after, descending=True, response=response,
+    )
+
+    now = datetime.utcnow()
+    return json_rows([
+        {
+            "id": t.id,
+            "member_id": t.member_id,
+            "title": t.title,
+            "freq": t.freq,
+            "due": t.due,
+            "done": is_done(t, now),
+        }
         for t in rows
-    ]
+    ], response)
 
 @router.get("/tasks/{task_id}", response_model=TaskDetailOut)
 def get_task_detail(
@@ -79,46 +100,125 @@ def get_task_detail(
     if not t or t.user_id != uid:
         raise HTTPException(status_code=404, detail="任务不存在")
 
+    # 统计直接读 TaskItem 上增量维护的字段，记录只取最近几条，不扫全部历史
+    now = datetime.utcnow()
     return TaskDetailOut(
         id=t.id,
         member_id=t.member_id,
         title=t.title,
         freq=t.freq,
         due=t.due,
-        done=t.done,
+        done=is_done(t, now),
         detail=load_list(t.detail_json),
-        logs=load_list(t.logs_json),
+        logs=recent_logs(session, t.id),
+        **task_stats(t, now),
     )
 
+def complete_tasks(session: Session, uid: int, task_ids: list[int]) -> list[dict]:
+    """
+    批量打卡：一次性任务一条 UPDATE 标记完成，周期任务按周期计数；
+    打卡记录一次 executemany 写进 TaskLog，每个成员的画像只算一次、只写一次；不 commit。
+    返回每个任务的结果，顺序与 task_ids 一致（重复的 id 只处理一次）
+    """
+    task_ids = list(dict.fromkeys(task_ids))
+    tasks = session.exec(
+        select(TaskItem).where(TaskItem.id.in_(task_ids), TaskItem.user_id == uid)
+    ).all()
+    found = {t.id: t for t in tasks}
+    now = datetime.utcnow()
+
+    # A. 一次性任务：一条 UPDATE 标记完成（done == False 条件防止并发重复打卡），
+    #    RETURNING 拿回真正被这次更新的 id：并发里输掉的那个请求不记打卡、不重复扣风险分
+    #    周期任务：一条带条件的 UPDATE 写回本周期次数 / 连续天数，同样只有真正写进去的才算打卡
+    one_off = [t for t in tasks if not t.done and not parse_freq(t.freq).recurring]
+    completed = []
+    if one_off:
+        updated_ids = set(session.exec(
+            update(TaskItem)
+            .where(TaskItem.id.in_([t.id for t in one_off]), TaskItem.done == False)  # noqa: E712
+            .values(
+                done=True,
+                log_count=TaskItem.log_count + 1,
+                completed_periods=1,
+                last_completed_at=now,
+            )
+            .returning(TaskItem.id)
+            .execution_options(synchronize_session=False)
+        ).scalars())
+        completed = [t for t in one_off if t.id in updated_ids]
+    recurring = [t for t in tasks if parse_freq(t.freq).recurring]
+    if recurring:
+        recurring_ids = complete_recurring(session, recurring, now)
+        completed += [t for t in recurring if t.id in recurring_ids]
+    completed_ids = {t.id for t in completed}
+
+    if completed:
+        session.exec(
+            insert(TaskLog),
+            params=[{"task_id": t.id, "member_id": t.member_id, "completed_at": now} for t in completed],
+        )
+
+    # B. 按成员归并任务标题，每个成员只跑一次画像进化
+    titles_by_member: dict[int, list[str]] = {}
+    for t in completed:
+        titles_by_member.setdefault(t.member_id, []).append(t.title)
+
+    if titles_by_member:
+        member_ids = list(titles_by_member)
+        changed_keys = [tasks_key(uid, mid) for mid in member_ids]
+        members = session.exec(
+            select(FamilyMember).where(FamilyMember.id.in_(member_ids), FamilyMember.user_id == uid)
+        ).all()
+        tags_by_member = load_member_tags(session, member_ids)
+        for member in members:
+            current_tags = tags_by_member[member.id]
+            new_tags = score_persona_risk(current_tags, titles_by_member[member.id])
+            if new_tags != current_tags:
+                set_member_tags(session, member, new_tags)
+                changed_keys.append(members_key(uid))
+        bump_versions(session, *changed_keys)
+
+    results = []
+    for task_id in task_ids:
+        t = found.get(task_id)
+        if t is None:
+            results.append({"task_id": task_id, "status": "not_found", "msg": "任务不存在"})
+        elif task_id not in completed_ids:
+            msg = "本周期已完成" if parse_freq(t.freq).recurring else "已完成"
+            results.append({"task_id": task_id, "status": "already_done", "msg": msg})
+        else:
+            results.append({"task_id": task_id, "status": "completed", "msg": "打卡成功", "member_id": t.member_id})
+    return results
+
+class TaskBatchComplete(BaseModel):
+    task_ids: list[int] = Field(..., min_length=1, max_length=MAX_BATCH_COMPLETE)
+
+@router.post("/tasks/complete")
+def complete_task_batch(
+    data: TaskBatchComplete,
+    session: Session = Depends(get_session),
+    uid: int = Depends(get_current_user_id),
+):
+    results = complete_tasks(session, uid, data.task_ids)
+    session.commit()
+    return {
+        "ok": True,
+        "completed": sum(r["status"] == "completed" for r in results),
+        "results": results,
+    }
+
 @router.post("/tasks/{task_id}/complete")
 def complete_task(
     task_id: int,
     session: Session = Depends(get_session),
     uid: int = Depends(get_current_user_id),
 ):
-    # A. 找到任务
-    task = session.get(TaskItem, task_id)
-    if not task or task.user_id != uid:
+    # 单个打卡 = 只有一个 id 的批量打卡
+    result = complete_tasks(session, uid, [task_id])[0]
+    if result["status"] == "not_found":
         raise HTTPException(status_code=404, detail="任务不存在")
-    if task.done:
-        return {"ok": True, "msg": "已完成"}
-
-    # B. 标记任务完成
-    task.done = True
-    
-    # C. 【重点】驱动画像进化
-    member = session.get(FamilyMember, task.member_id)
-    if member:
-        # 1. 解析当前标签字典
-        current_tags = load_tags(member.tags_json)
-        
-        # 2. 调用引擎计算新画像
-        # 我们把任务标题传进去，让引擎判断该给谁减分
-        new_tags = update_persona_risk(current_tags, task.title)
-        
-        # 3. 存回数据库
-        member.tags_json = dump_tags(new_tags)
-        session.add(member)
+    if result["status"] == "already_done":
+        return {"ok": True, "msg": result["msg"]}
 
     session.commit()
     return {"ok": True, "msg": "打卡成功，画像已自动进化"}
@@ -141,6 +241,7 @@ def create_task(
         logs_json="[]",
     )
     session.add(t)
+    bump_versions(session, tasks_key(uid, data.member_id))
     session.commit()
     session.refresh(t)
 
@@ -153,4 +254,5 @@ def create_task(
         done=t.done,
         detail=data.detail,
         logs=[],
+        **task_stats(t, t.created_at),
     )
@@ -0,0 +1,422 @@
+# backend/app/services/bulk_import.py
+# 批量导入成员 / 建议 / 任务（从老系统迁移用）：NDJSON 或 JSON 数组，边读边解析边写
+#
+# - 请求体按块读，NDJSON 逐行、JSON 数组逐个元素解析，不把整个文件读进内存
+# - 每攒够 IMPORT_CHUNK_SIZE 条：校验 -> 每张表一条 executemany -> 提交（每块一个事务，不长时间占写锁）
+# - 单行出错（格式 / 校验 / 引用了不存在的成员）只记进 errors，不影响其他行
+# - 记录格式与 /api/export 一致：{"type": "member" | "advice" | "task", "data": {...}}；
+#   也可以直接传 data 本身，用 ?type= 指定类型；导出文件里的会话 / 消息（session / message）不导入，
+#   只在 skipped 里计数，原样导回自己的导出文件不算失败
+# - 成员的 id 是“源系统里的 id”：后面的建议 / 任务用 member_id 引用它时自动换成新 id
+#   （所以成员要排在引用它的建议 / 任务前面，导出文件本来就是这个顺序）；
+#   relation 为“本人”的成员不新建，直接对应到当前账号的本人档案
+# - member_id 只有在明确指向当前账号时才当成已有成员的 id：文件里没有任何成员记录（只导建议 / 任务），
+#   或者是本账号自己的导出文件。别的账号的导出、或者带了成员记录的文件，引用不到本次导入的成员就报行级错误；
+#   引用的成员本身导入失败（校验 / 写入出错）的，同样报错，不会挂到碰巧同 id 的别的成员名下
+import codecs
+import json
+import re
+from dataclasses import dataclass, field
+from typing import AsyncIterator
+
+from pydantic import BaseModel, ValidationError, model_validator
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import Session, select
+
+from app.core.serialization import dump_list, load_list, loads
+from app.db import engine
+from app.models import AdviceItem, FamilyMember, MemberRiskTag, TaskItem
+from app.services.risk_tags import dump_tags, load_tags, normalize_tags, tag_rows
+from app.services.versions import advice_key, bump_versions, members_key, tasks_key
+
+IMPORT_CHUNK_SIZE = 1000             # 每个事务写入的行数
+IMPORT_MAX_RECORD_BYTES = 1 << 20    # 单条记录最大 1MB（超过按格式错误处理）
+IMPORT_MAX_ERRORS = 1000             # 响应里最多列出多少条行级错误（计数不受限）
+
+RECORD_TYPES = ("member", "advice", "task")
+SKIPPED_TYPES = ("session", "message")   # 导出文件里有、但不导入的类型
+
+# ---------- 记录校验 ----------
+
+class ImportMember(BaseModel):
+    id: int | None = None               # 源系统里的 id，只用来对应后面的建议 / 任务
+    name: str
+    relation: str
+    gender: str | None = None
+    age: int | None = None
+    height: float | None = None
+    weight: float | None = None
+    tags: list[str] | dict[str, dict] | None = None
+    allergies: str | None = None
+    meds: str | None = None
+    notes: str | None = None
+
+    @model_validator(mode="before")
+    @classmethod
+    def _from_export(cls, data):
+        # 兼容 /api/export 的原始列：tags_json
+        if isinstance(data, dict) and "tags" not in data and "tags_json" in data:
+            data = {**data, "tags": load_tags(data["tags_json"])}
+        return data
+
+class ImportAdvice(BaseModel):
+    member_id: int
+    title: str
+    reason: str = ""
+    tags: list[str] = []
+    detail: list[str] = []
+
+    @model_validator(mode="before")
+    @classmethod
+    def _from_export(cls, data):
+        if isinstance(data, dict):
+            if "tags" not in data and "tags_json" in data:
+                data = {**data, "tags": load_list(data["tags_json"])}
+            if "detail" not in data and "detail_json" in data:
+                data = {**data, "detail": load_list(data["detail_json"])}
+        return data
+
+class ImportTask(BaseModel):
+    member_id: int
+    title: str
+    freq: str = ""
+    due: str = ""
+    done: bool = False
+    detail: list[str] = []
+
+    @model_validator(mode="before")
+    @classmethod
+    def _from_export(cls, data):
+        if isinstance(data, dict) and "detail" not in data and "detail_json" in data:
+            data = {**data, "detail": load_list(data["detail_json"])}
+        return data
+
+SCHEMAS = {"member": ImportMember, "advice": ImportAdvice, "task": ImportTask}
+
+def _validation_message(e: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(map(str, err['loc'])) or 'data'}: {err['msg']}" for err in e.errors()[:3])
+
+def _source_member_id(data: dict) -> int | None:
+    raw = data.get("id")
+    if raw is None or isinstance(raw, bool):
+        return None
+    try:
+        return int(raw)
+    except (TypeError, ValueError):
+        return None
+
+# ---------- 请求体解析 ----------
+
+class ImportFormatError(Exception):
+    """
+    JSON 数组本身坏了（没法再往后对齐），后面的内容只能放弃
+    """
+
+def _parse_line(line: bytes):
+    try:
+        return loads(line)
+    except ValueError as e:
+        return ValueError(f"JSON 格式错误：{e}")
+
+async def iter_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, object]]:
+    """
+    按块读请求体，逐条产出 (序号, 解析结果)；NDJSON 里解析失败的行产出 (序号, ValueError)。
+    第一个非空白字符是 [ 的按 JSON 数组解析，否则按 NDJSON
+    """
+    buf = b""
+    async for chunk in chunks:
+        buf += chunk
+        if buf.strip():
+            break
+    if buf.lstrip().startswith(b"["):
+        parse = _iter_json_array(buf.lstrip()[1:], chunks)
+    else:
+        parse = _iter_ndjson(buf, chunks)
+    async for item in parse:
+        yield item
+
+async def _iter_ndjson(buf: bytes, chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, object]]:
+    row = 0
+    eof = False
+    skipping = False  # 正在跳过一行超长的记录，直到下一个换行
+    while True:
+        # 一次切出这一块里所有完整的行，最后半行留在 buf 里等下一块
+        *lines, buf = buf.split(b"\n")
+        for line in lines:
+            if skipping:
+                skipping = False
+            elif line.strip():
+                row += 1
+                yield row, _parse_line(line)
+        if eof:
+            if buf.strip() and not skipping:
+                row += 1
+                yield row, _parse_line(buf)
+            return
+        if len(buf) > IMPORT_MAX_RECORD_BYTES and not skipping:
+            row += 1
+            yield row, ValueError("单行超过大小限制")
+            skipping = True
+        if skipping:
+            buf = b""
+        try:
+            buf += await anext(chunks)
+        except StopAsyncIteration:
+            eof = True
+
+_WS = re.compile(r"\s*")
+
+async def _iter_json_array(buf: bytes, chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, object]]:
+    """
+    增量解析 JSON 数组：缓冲区里能完整解出一个元素就产出一个，解不出来就再读一块。
+    用下标往后推进，不反复切片大字符串；已经解析过的部分在读下一块时丢掉
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()  # 块边界切断的汉字留到下一块再解码
+    text = utf8.decode(buf)
+    pos = 0
+    row = 0
+    eof = False
+    expect_value = True
+
+    async def read_more() -> bool:
+        nonlocal text, pos, eof
+        if eof:
+            return False
+        try:
+            chunk = await anext(chunks)
+        except StopAsyncIteration:
+            eof = True
+            return False
+        text, pos = text[pos:] + utf8.decode(chunk), 0
+        return True
+
+    while True:
+        pos = _WS.match(text, pos).end()
+        if pos >= len(text):
+            if not await read_more():
+                raise ImportFormatError("JSON 数组没有结束（缺少 ]）")
+            continue
+        ch = text[pos]
+        if ch == "]":
+            return
+        if not expect_value:
+            if ch != ",":
+                raise ImportFormatError(f"第 {row} 条之后 JSON 格式错误")
+            pos += 1
+            expect_value = True
+            continue
+        try:
+            value, end = decoder.raw_decode(text, pos)
+        except json.JSONDecodeError as e:
+            # 可能只是这一条还没读全：再读一块重试；读完了 / 太长了还解不出来就是真的坏了
+            if len(text) - pos <= IMPORT_MAX_RECORD_BYTES and await read_more():
+                continue
+            raise ImportFormatError(f"第 {row + 1} 条 JSON 格式错误：{e.msg}")
+        if end == len(text) and await read_more():
+            continue  # 正好停在块尾（比如数字被截断），读完整了再解
+        row += 1
+        pos = end
+        expect_value = False
+        yield row, value
+
+# ---------- 写入 ----------
+
+@dataclass
+class ImportResult:
+    received: int = 0
+    inserted: dict = field(default_factory=lambda: {t: 0 for t in RECORD_TYPES})
+    skipped: dict = field(default_factory=lambda: {t: 0 for t in SKIPPED_TYPES})
+    failed: int = 0
+    errors: list = field(default_factory=list)
+    aborted: str | None = None
+
+    def error(self, row: int, kind: str | None, message: str):
+        self.failed += 1
+        if len(self.errors) < IMPORT_MAX_ERRORS:
+            self.errors.append({"row": row, "type": kind, "error": message})
+
+    def to_dict(self) -> dict:
+        return {
+            "ok": self.aborted is None,
+            "received": self.received,
+            "inserted": self.inserted,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "errors": sorted(self.errors, key=lambda e: e["row"]),
+            "errors_truncated": self.failed > len(self.errors),
+            "aborted": self.aborted,
+        }
+
+class BulkImporter:
+    """
+    一次导入的状态：攒一块记录 -> flush() 写一个事务。flush 是同步的，接口里丢到线程池跑
+    """
+
+    def __init__(self, uid: int, default_type: str | None = None):
+        self.uid = uid
+        self.default_type = default_type
+        self.result = ImportResult()
+        self.pending: list[tuple[int, str, dict]] = []
+        self.member_map: dict[int, int] = {}   # 源系统成员 id -> 新 id
+        self.source_ids: set[int] = set()      # 文件里出现过的源系统成员 id（包括导入失败的）
+        self.source_user_id = None             # 导出文件头里的账号 id（不是导出文件就是 None）
+        self.member_ids: set[int] = set()      # 导入开始前当前账号已有的成员
+        self.self_member_id: int | None = None
+
+        with Session(engine) as db:
+            for mid, relation in db.exec(
+                select(FamilyMember.id, FamilyMember.relation).where(FamilyMember.user_id == uid)
+            ).all():
+                self.member_ids.add(mid)
+                if relation == "本人" and self.self_member_id is None:
+                    self.self_member_id = mid
+
+    def add(self, row: int, record) -> bool:
+        """
+        收下一条解析好的记录；攒够一块返回 True（调用方该 flush 了）
+        """
+        self.result.received += 1
+        if isinstance(record, Exception):
+            self.result.error(row, None, str(record))
+            return False
+
+        if isinstance(record, dict) and record.get("type") == "export":  # 导出文件的头信息行
+            self.result.received -= 1
+            self.source_user_id = record.get("user_id")
+            return False
+
+        kind, data = self.default_type, record
+        if isinstance(record, dict) and "type" in record and "data" in record:
+            kind, data = record["type"], record["data"]
+        if kind in SKIPPED_TYPES:
+            self.result.skipped[kind] += 1
+            return False
+        if kind not in RECORD_TYPES:
+            self.result.error(row, kind, "未知类型，应为 member / advice / task（或用 ?type= 指定）")
+            return False
+        if not isinstance(data, dict):
+            self.result.error(row, kind, "记录必须是 JSON 对象")
+            return False
+
+        if kind == "member":
+            # 校验之前就记下源 id：这条成员导入失败时，引用它的建议 / 任务也要报错
+            source_id = _source_member_id(data)
+            if source_id is not None:
+                self.source_ids.add(source_id)
+
+        self.pending.append((row, kind, data))
+        return len(self.pending) >= IMPORT_CHUNK_SIZE
+
+    def flush(self):
+        """
+        校验并写入攒着的一块：成员先写（拿到新 id），再写引用它们的建议 / 任务，一个事务提交。
+        这一块的成员映射、行级错误都等提交成功后才生效，写失败时整块按失败记
+        """
+        if not self.pending:
+            return
+        chunk, self.pending = self.pending, []
+
+        valid: dict[str, list[tuple[int, BaseModel]]] = {t: [] for t in RECORD_TYPES}
+        for row, kind, data in chunk:
+            try:
+                valid[kind].append((row, SCHEMAS[kind].model_validate(data)))
+            except ValidationError as e:
+                self.result.error(row, kind, _validation_message(e))
+
+        with Session(engine) as db:
+            try:
+                written = self._write(db, valid)
+                bump_versions(db, *written.touched)
+                db.commit()
+            except SQLAlchemyError as e:
+                # 整块写失败（极少见）：回滚这一块，记到这块的每一行上，后面的块照常导入
+                db.rollback()
+                for kind, items in valid.items():
+                    for row, _ in items:
+                        self.result.error(row, kind, f"写入失败：{type(e).__name__}")
+                return
+
+        self.member_map.update(written.member_map)
+        for kind, n in written.counts.items():
+            self.result.inserted[kind] += n
+        for row, kind, message in written.errors:
+            self.result.error(row, kind, message)
+
+    def _write(self, db: Session, valid: dict) -> "_Written":
+        written = _Written()
+
+        # A. 成员：一条 executemany 拿回新 id（按参数顺序），标签行再一条 executemany
+        members = []
+        for _, m in valid["member"]:
+            if m.relation == "本人" and self.self_member_id is not None:
+                if m.id is not None:
+                    written.member_map[m.id] = self.self_member_id
+                continue
+            members.append(m)
+        if members:
+            tags = [normalize_tags(m.tags) for m in members]
+            new_ids = db.exec(
+                insert(FamilyMember).returning(FamilyMember.id, sort_by_parameter_order=True),
+                params=[
+                    {
+                        "user_id": self.uid,
+                        **m.model_dump(exclude={"id", "tags"}, exclude_none=True),
+                        "tags_json": dump_tags(t),
+                    }
+                    for m, t in zip(members, tags)
+                ],
+            ).scalars().all()
+            tag_params = []
+            for m, new_id, t in zip(members, new_ids, tags):
+                if m.id is not None:
+                    written.member_map[m.id] = new_id
+                tag_params += tag_rows(new_id, t)
+            if tag_params:
+                db.exec(insert(MemberRiskTag), params=tag_params)
+            written.touched.append(members_key(self.uid))
+        written.counts["member"] = len(members)
+
+        # B. 建议 / 任务：member_id 先按本次导入的映射换成新 id；映射不到的，只有明确指向当前账号时
+        #    才按已有成员的 id 处理（见文件头说明）
+        member_map = {**self.member_map, **written.member_map}
+        accept_existing = self.source_user_id == self.uid or (self.source_user_id is None and not self.source_ids)
+        for kind, model, key in (("advice", AdviceItem, advice_key), ("task", TaskItem, tasks_key)):
+            rows = []
+            for row, item in valid[kind]:
+                member_id = member_map.get(item.member_id)
+                if member_id is None:
+                    if item.member_id in self.source_ids:
+                        written.errors.append((row, kind, f"成员 {item.member_id} 导入失败，跳过引用它的记录"))
+                        continue
+                    if not accept_existing:
+                        written.errors.append((row, kind, f"成员 {item.member_id} 不在本次导入的成员里"))
+                        continue
+                    if item.member_id not in self.member_ids:
+                        written.errors.append((row, kind, f"成员 {item.member_id} 不存在"))
+                        continue
+                    member_id = item.member_id
+                data = item.model_dump(exclude={"member_id", "tags", "detail"})
+                data.update(user_id=self.uid, member_id=member_id, detail_json=dump_list(item.detail))
+                if kind == "advice":
+                    data["tags_json"] = dump_list(item.tags)
+                else:
+                    data["logs_json"] = "[]"
+                    data["completed_periods"] = 1 if item.done else 0
+                rows.append(data)
+            if rows:
+                db.exec(insert(model), params=rows)
+                written.touched += [key(self.uid, mid) for mid in {r["member_id"] for r in rows}]
+            written.counts[kind] = len(rows)
+        return written
+
+@dataclass
+class _Written:
+    """
+    一块写入的结果，提交成功后才合并进 BulkImporter
+    """
+    member_map: dict = field(default_factory=dict)
+    counts: dict = field(default_factory=dict)
+    errors: list = field(default_factory=list)
+    touched: list = field(default_factory=list)
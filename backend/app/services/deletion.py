@@ -0,0 +1,99 @@
+# backend/app/services/deletion.py
+# 级联删除：全部用 DELETE ... WHERE 批量语句，不把行读进内存，历史再多内存占用也是常数
+# - delete_session_cascade / delete_member_cascade：一个事务里删完（调用方 commit）
+# - purge_member_data：超大账号用的后台分批清理，每批一个小事务，不长时间占着写锁；
+#   每批都在线程池里执行，等写锁、删大表时不卡事件循环
+from sqlalchemy import delete, select
+from sqlmodel import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.db import engine
+from app.models import (
+    AdviceItem, ChatMessage, ConsultSession, FamilyMember, MemberRiskTag, SessionSummary, TaskItem,
+    TaskLog,
+)
+from app.services.versions import advice_key, bump_versions, tasks_key
+
+PURGE_BATCH_SIZE = 5000
+
+def delete_session_cascade(db: Session, session_id: int) -> int:
+    """
+    删除会话及其消息、摘要。返回删掉的消息数；不 commit
+    """
+    result = db.exec(delete(ChatMessage).where(ChatMessage.session_id == session_id))
+    db.exec(delete(SessionSummary).where(SessionSummary.session_id == session_id))
+    db.exec(delete(ConsultSession).where(ConsultSession.id == session_id))
+    return result.rowcount
+
+def delete_member_children(db: Session, member_id: int):
+    """
+    删除成员名下的会话、消息、摘要、建议、任务及打卡记录、风险标签（不删成员本身）；不 commit
+    """
+    member_sessions = select(ConsultSession.id).where(ConsultSession.member_id == member_id)
+    db.exec(delete(ChatMessage).where(ChatMessage.session_id.in_(member_sessions)))
+    db.exec(delete(SessionSummary).where(SessionSummary.session_id.in_(member_sessions)))
+    db.exec(delete(ConsultSession).where(ConsultSession.member_id == member_id))
+    db.exec(delete(AdviceItem).where(AdviceItem.member_id == member_id))
+    db.exec(delete(TaskItem).where(TaskItem.member_id == member_id))
+    db.exec(delete(TaskLog).where(TaskLog.member_id == member_id))
+    db.exec(delete(MemberRiskTag).where(MemberRiskTag.member_id == member_id))
+
+def delete_member_cascade(db: Session, member_id: int):
+    """
+    删除成员及其全部数据；不 commit
+    """
+    delete_member_children(db, member_id)
+    db.exec(delete(FamilyMember).where(FamilyMember.id == member_id))
+
+def _delete_batch(model, condition) -> int:
+    with Session(engine) as db:
+        batch = select(model.id).where(condition).limit(PURGE_BATCH_SIZE)
+        result = db.exec(delete(model).where(model.id.in_(batch)))
+        db.commit()
+    return result.rowcount
+
+async def _delete_in_batches(model, condition) -> int:
+    """
+    按主键分批删：每批 PURGE_BATCH_SIZE 行、单独提交，每批丢到线程池里跑
+    """
+    total = 0
+    while True:
+        deleted = await run_in_threadpool(_delete_batch, model, condition)
+        total += deleted
+        if deleted < PURGE_BATCH_SIZE:
+            return total
+
+def _delete_member_leftovers(member_id: int, user_id: int | None) -> int:
+    member_sessions = select(ConsultSession.id).where(ConsultSession.member_id == member_id)
+    with Session(engine) as db:
+        db.exec(delete(SessionSummary).where(SessionSummary.session_id.in_(member_sessions)))
+        sessions = db.exec(delete(ConsultSession).where(ConsultSession.member_id == member_id)).rowcount
+        db.exec(delete(MemberRiskTag).where(MemberRiskTag.member_id == member_id))
+        if user_id is not None:
+            bump_versions(db, advice_key(user_id, member_id), tasks_key(user_id, member_id))
+        db.commit()
+    return sessions
+
+async def purge_member_data(member_id: int, user_id: int | None = None) -> dict:
+    """
+    后台任务：分批清理一个（已删除的）成员留下的数据。
+    成员行先同步删掉，用户立刻看不到；这里慢慢删大表。
+    user_id：清理完再作废一次该成员的建议 / 任务列表版本（清理中途拿到的 ETag 不能一直命中）
+    """
+    member_sessions = select(ConsultSession.id).where(ConsultSession.member_id == member_id)
+    messages = await _delete_in_batches(ChatMessage, ChatMessage.session_id.in_(member_sessions))
+    advice = await _delete_in_batches(AdviceItem, AdviceItem.member_id == member_id)
+    tasks = await _delete_in_batches(TaskItem, TaskItem.member_id == member_id)
+    task_logs = await _delete_in_batches(TaskLog, TaskLog.member_id == member_id)
+
+    # 会话、摘要、标签数量小，最后一个事务删掉
+    sessions = await run_in_threadpool(_delete_member_leftovers, member_id, user_id)
+
+    return {
+        "ok": True,
+        "messages": messages,
+        "sessions": sessions,
+        "advice": advice,
+        "tasks": tasks,
+        "task_logs": task_logs,
+    }
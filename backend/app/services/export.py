@@ -0,0 +1,79 @@
+# backend/app/services/export.py
+# 导出用户的全部健康档案：成员、会话、聊天记录、建议、任务，逐行 NDJSON（可选 gzip）
+#
+# - 每张表一条查询，用服务端游标（stream_results + yield_per）一批批往外吐，
+#   内存里最多只有一批行，1 万条和 1000 万条消息占用一样
+# - 全部表在同一个连接 / 同一个读事务里导出，数据是一个一致的快照
+#   （代价是导出期间一直占着一个连接；客户端断开时生成器被关闭，连接随之归还）
+# - 每行 {"type": "message", "data": {...列原样...}}，第一行是 {"type": "export", ...} 头信息
+import zlib
+from datetime import datetime
+from typing import Iterator
+
+from sqlalchemy import select
+
+from app.core.serialization import dumps_bytes
+from app.db import engine
+from app.models import AdviceItem, ChatMessage, ConsultSession, FamilyMember, TaskItem
+
+EXPORT_BATCH_SIZE = 1000   # 服务端游标每批取多少行（也是每次往外写的行数）
+EXPORT_FORMAT_VERSION = 1
+
+def _columns(model, exclude: tuple = ("user_id",)):
+    # user_id 就是导出人自己，不用每行都带
+    return [c for c in model.__table__.c if c.name not in exclude]
+
+def export_queries(uid: int) -> list[tuple[str, object]]:
+    """
+    (行类型, 查询)，按“先成员后明细”的顺序；每条都按主键（或索引顺序）排好，导出结果稳定
+    """
+    user_sessions = select(ConsultSession.id).where(ConsultSession.user_id == uid)
+    return [
+        ("member", select(*_columns(FamilyMember)).where(FamilyMember.user_id == uid).order_by(FamilyMember.id)),
+        ("session", select(*_columns(ConsultSession)).where(ConsultSession.user_id == uid).order_by(ConsultSession.id)),
+        (
+            "message",
+            select(*_columns(ChatMessage))
+            .where(ChatMessage.session_id.in_(user_sessions))
+            .order_by(ChatMessage.session_id, ChatMessage.id),
+        ),
+        ("advice", select(*_columns(AdviceItem)).where(AdviceItem.user_id == uid).order_by(AdviceItem.id)),
+        ("task", select(*_columns(TaskItem)).where(TaskItem.user_id == uid).order_by(TaskItem.id)),
+    ]
+
+def iter_export_lines(uid: int, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[bytes]:
+    """
+    生成 NDJSON：每次产出一批行拼好的 bytes
+    """
+    header = {
+        "type": "export",
+        "version": EXPORT_FORMAT_VERSION,
+        "user_id": uid,
+        "exported_at": datetime.utcnow(),
+    }
+    yield dumps_bytes(header) + b"\n"
+
+    with engine.connect() as conn:
+        conn = conn.execution_options(stream_results=True, yield_per=batch_size)
+        with conn.begin():
+            for kind, stmt in export_queries(uid):
+                result = conn.execute(stmt)
+                for rows in result.partitions():
+                    yield b"".join(
+                        dumps_bytes({"type": kind, "data": dict(r._mapping)}) + b"\n" for r in rows
+                    )
+
+def gzip_chunks(chunks: Iterator[bytes], level: int = 6) -> Iterator[bytes]:
+    """
+    边生成边压缩（gzip 格式），不把整份导出攒在内存里
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits=31：带 gzip 头
+    for chunk in chunks:
+        out = compressor.compress(chunk)
+        if out:
+            yield out
+    yield compressor.flush()
+
+def stream_export(uid: int, gzip: bool = False) -> Iterator[bytes]:
+    chunks = iter_export_lines(uid)
+    return gzip_chunks(chunks) if gzip else chunks
@@ -0,0 +1,101 @@
+# backend/app/services/history.py
+# 问诊上下文窗口：滚动摘要 + 最近 N 条原文，控制每轮发给 AI 的 token 数
+# - 每轮只查“还没压进摘要”的消息，不再整段会话全量加载
+# - 滚出窗口的旧消息在回复发出后由后台任务增量合并进摘要
+import os
+from datetime import datetime
+
+from sqlmodel import Session, select
+from starlette.concurrency import run_in_threadpool
+
+from app.db import engine
+from app.models import ChatMessage, SessionSummary
+from app.services.llm import summarize_history
+
+# 每轮最多带几条原文 / 原文部分的大致 token 预算（超出的旧消息压进摘要）
+HISTORY_RECENT_MESSAGES = int(os.getenv("HISTORY_RECENT_MESSAGES", "8"))
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "3000"))
+
+# 正在压缩的会话，防止同一会话并发压缩、重复合并
+_compacting: set[int] = set()
+
+def estimate_tokens(text: str) -> int:
+    # 粗估：中文 1 字 ≈ 1 token，ASCII 4 字符 ≈ 1 token
+    ascii_count = sum(1 for ch in text if ord(ch) < 128)
+    return (len(text) - ascii_count) + ascii_count // 4 + 1
+
+def select_window(messages: list[ChatMessage]) -> list[ChatMessage]:
+    """
+    从最新往回取，直到条数或 token 预算用完（至少保留最新一条）
+    """
+    window = []
+    used = 0
+    for m in reversed(messages):
+        cost = estimate_tokens(m.content)
+        if window and (len(window) >= HISTORY_RECENT_MESSAGES or used + cost > HISTORY_TOKEN_BUDGET):
+            break
+        window.append(m)
+        used += cost
+    window.reverse()
+    return window
+
+def load_unsummarized(db: Session, session_id: int) -> tuple[str, list[ChatMessage]]:
+    """
+    返回 (当前摘要, 还没压进摘要的消息)
+    """
+    row = db.get(SessionSummary, session_id)
+    summary = row.summary if row else ""
+    upto_id = row.upto_message_id if row else 0
+
+    messages = db.exec(
+        select(ChatMessage)
+        .where(ChatMessage.session_id == session_id, ChatMessage.id > upto_id)
+        .order_by(ChatMessage.id)
+    ).all()
+    return summary, messages
+
+def build_history_window(db: Session, session_id: int) -> tuple[str, list[dict], int]:
+    """
+    组装本轮发给 AI 的上下文：(摘要, 最近几条消息 payload, 未压缩消息数)
+    """
+    summary, messages = load_unsummarized(db, session_id)
+    window = select_window(messages)
+    payload = [{"role": m.role, "content": m.content} for m in window]
+    return summary, payload, len(messages)
+
+def load_for_compaction(session_id: int) -> tuple[str, list[ChatMessage]]:
+    with Session(engine) as db:
+        return load_unsummarized(db, session_id)
+
+def save_summary(session_id: int, summary: str, upto_message_id: int):
+    with Session(engine) as db:
+        row = db.get(SessionSummary, session_id) or SessionSummary(session_id=session_id)
+        row.summary = summary
+        row.upto_message_id = upto_message_id
+        row.updated_at = datetime.utcnow()
+        db.add(row)
+        db.commit()
+
+async def compact_session_history(session_id: int):
+    """
+    后台任务：把滚出窗口的旧消息合并进摘要（只处理新增部分，不重算全量）
+    """
+    if session_id in _compacting:
+        return
+    _compacting.add(session_id)
+    try:
+        # 读写库都在线程池里跑，事件循环上只等 AI
+        summary, messages = await run_in_threadpool(load_for_compaction, session_id)
+        older = messages[: len(messages) - len(select_window(messages))]
+        if not older:
+            return
+
+        new_summary = await summarize_history(
+            summary, [{"role": m.role, "content": m.content} for m in older]
+        )
+        if new_summary is None:
+            return
+
+        await run_in_threadpool(save_summary, session_id, new_summary, older[-1].id)
+    finally:
+        _compacting.discard(session_id)
@@ -0,0 +1,159 @@
+# backend/app/services/jobs.py
+# 进程内的后台任务队列：有界 worker 池 + 任务状态表
+# 适合“生成方案”这类耗时几十秒的 AI 任务：接口先返回 job_id，前端轮询 /consult/jobs/{id}
+# submit 是线程安全的：同步接口（在线程池里跑）也能直接提交，入队会转回事件循环线程执行
+import asyncio
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Optional
+
+JOB_WORKERS = 4          # 同时最多跑几个任务
+JOB_QUEUE_SIZE = 100     # 排队上限，满了直接拒绝，防止无限堆积
+JOB_TTL_SECONDS = 3600   # 结束的任务保留多久供查询
+JOB_DEDUP_SECONDS = 30   # 刚成功的任务，这段时间内同 key 再提交也直接复用（防手抖连点）
+
+ACTIVE_STATUSES = ("queued", "running")
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    key: Optional[str] = None       # 去重键，比如 "generate_plan:12"
+    owner_id: Optional[int] = None  # 归属用户，查询时做权限校验
+    status: str = "queued"          # queued / running / done / failed
+    result: Any = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+class JobQueueFull(Exception):
+    pass
+
+class JobQueue:
+    def __init__(self, workers: int = JOB_WORKERS, maxsize: int = JOB_QUEUE_SIZE):
+        self.workers = workers
+        self.maxsize = maxsize
+        self.jobs: dict[str, Job] = {}
+        self.latest_by_key: dict[str, str] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: list[asyncio.Task] = []
+        self._lock = threading.Lock()  # 保护任务表和排队计数（submit 可能来自线程池）
+        self._pending = 0              # 已提交、还没被 worker 取走的任务数
+
+    def start(self):
+        """
+        启动 worker（幂等）。必须在事件循环里调用
+        """
+        if self._tasks:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()  # 排队上限由 _pending 控制，这里不设 maxsize
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+        self._loop = None
+        self._pending = 0
+
+    def _in_loop_thread(self) -> bool:
+        try:
+            return asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            return False
+
+    def submit(
+        self,
+        kind: str,
+        fn: Callable[..., Awaitable[Any]],
+        *args,
+        key: Optional[str] = None,
+        owner_id: Optional[int] = None,
+    ) -> Job:
+        """
+        提交任务，立刻返回 Job。
+        同一个 key 还在排队/执行，或刚成功不久时，直接返回已有的那个（防重复提交）。
+        可以在事件循环里调用，也可以在线程池里调用（同步接口）；后者要求队列已经 start 过
+        """
+        if self._loop is None:
+            if not self._in_loop_thread():
+                raise RuntimeError("任务队列还没启动")
+            self.start()
+
+        with self._lock:
+            self._prune()
+
+            existing = self.jobs.get(self.latest_by_key.get(key)) if key else None
+            if existing:
+                if existing.status in ACTIVE_STATUSES:
+                    return existing
+                if existing.status == "done" and time.time() - existing.finished_at < JOB_DEDUP_SECONDS:
+                    return existing
+
+            if self._pending >= self.maxsize:
+                raise JobQueueFull()
+
+            job = Job(id=uuid.uuid4().hex, kind=kind, key=key, owner_id=owner_id)
+            self._pending += 1
+            self.jobs[job.id] = job
+            if key:
+                self.latest_by_key[key] = job.id
+
+        # asyncio.Queue 不是线程安全的：不在事件循环线程上时，交给循环线程去入队
+        item = (job, fn, args)
+        if self._in_loop_thread():
+            self._queue.put_nowait(item)
+        else:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, item)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+
+    async def _worker(self):
+        while True:
+            job, fn, args = await self._queue.get()
+            with self._lock:
+                self._pending -= 1
+            job.status = "running"
+            try:
+                job.result = await fn(*args)
+                job.status = "done"
+            except Exception as e:
+                print(f"后台任务失败 [{job.kind}] {job.id}: {e}")
+                job.error = str(e)
+                job.status = "failed"
+            finally:
+                job.finished_at = time.time()
+                self._queue.task_done()
+
+    def _prune(self):
+        # 清掉过期的已结束任务，避免状态表无限增长
+        now = time.time()
+        expired = [
+            jid for jid, j in self.jobs.items()
+            if j.finished_at and now - j.finished_at > JOB_TTL_SECONDS
+        ]
+        for jid in expired:
+            job = self.jobs.pop(jid)
+            if job.key and self.latest_by_key.get(job.key) == jid:
+                del self.latest_by_key[job.key]
+
+job_queue = JobQueue()
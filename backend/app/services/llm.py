@@ -1,23 +1,79 @@
 # backend/app/services/llm.py
 import json
-from openai import OpenAI
+import os
+import time
+from openai import AsyncOpenAI
 
-API_KEY = "sk-6f0b8c5f36bd4b6fb9551538767cf996" 
+from app.core.metrics import LLM_FIRST_TOKEN, observe_llm
+from .llm_cache import CompletionCache, MemoryCompletionCache, make_cache_key
 
-client = OpenAI(
+API_KEY = os.getenv("LLM_API_KEY", "sk-6f0b8c5f36bd4b6fb9551538767cf996")
+
+# 默认走 DashScope；压测时可以指向本地桩服务，比如
+# LLM_BASE_URL=http://127.0.0.1:9000/v1 （见 tools/llm_stub.py）
+BASE_URL = os.getenv("LLM_BASE_URL", "https://dashscope.aliyuncs.com/compatible-mode/v1")
+
+# 异步客户端：所有调用都在事件循环上 await，不再占用线程池
+client = AsyncOpenAI(
     api_key=API_KEY,
-    base_url="https://dashscope.aliyuncs.com/compatible-mode/v1",
+    base_url=BASE_URL,
 )
 
-def chat_with_ai(history_messages: list, persona: dict) -> str:
+CHAT_MODEL = os.getenv("LLM_MODEL", "qwen-plus")
+CHAT_FALLBACK_REPLY = "抱歉，我现在感觉大脑有点混乱，请稍后再试。"
+
+# 回复缓存：默认进程内 LRU，需要多进程共享时换成 SqliteCompletionCache
+completion_cache: CompletionCache = MemoryCompletionCache()
+
+def set_completion_cache(cache: CompletionCache):
+    global completion_cache
+    completion_cache = cache
+
+async def create_completion(
+    messages: list,
+    use_cache: bool = True,
+    cache_ttl: int | None = None,
+    caller: str = "create_completion",
+    **params,
+) -> str:
     """
-    回归纯净聊天逻辑：
-    1. 接收历史记录，保证 AI 记得你之前说过的话。
-    2. 注入画像，保证 AI 了解你的身体状况。
-    3. 返回纯文本回复。
+    非流式调用的统一入口：先查缓存，没命中再请求 AI，成功的结果写回缓存。
+    use_cache=False 时既不读也不写（需要“新鲜”回复的场景）。异常交给调用方兜底，不会被缓存。
+    caller：调用方函数名，耗时和 token 用量按它记到 /api/metrics
     """
-    
-    system_instruction = f"""
+    start = time.perf_counter()
+    key = make_cache_key(CHAT_MODEL, messages, **params) if use_cache else None
+    if key:
+        cached = await completion_cache.aget(key)
+        if cached is not None:
+            observe_llm(caller, time.perf_counter() - start, "cache_hit")
+            return cached
+
+    try:
+        response = await client.chat.completions.create(model=CHAT_MODEL, messages=messages, **params)
+    except Exception:
+        observe_llm(caller, time.perf_counter() - start, "error")
+        raise
+    observe_llm(caller, time.perf_counter() - start, "ok", response.usage)
+    content = response.choices[0].message.content
+    if key and content:
+        await completion_cache.aset(key, content, cache_ttl)
+    return content
+
+def with_history_summary(system_instruction: str, summary: str) -> str:
+    # 摘要拼在画像 prompt 后面，保证前缀每轮都一样
+    if not summary:
+        return system_instruction
+    return system_instruction + f"""
+    【此前对话摘要】：
+    {summary}
+    """
+
+def build_chat_system_prompt(persona: dict) -> str:
+    """
+    根据健康画像拼出问诊用的 system prompt（普通聊天和流式聊天共用）
+    """
+    return f"""
     你是一个专业的家庭 AI 医疗助手。请根据用户的健康画像和对话历史，提供亲切、专业的健康咨询。
 
     【用户当前健康画像】：
@@ -33,39 +89,127 @@ def chat_with_ai(history_messages: list, persona: dict) -> str:
     4. 直接输出回复文本，不要输出 JSON 格式，也不要带任何标签。
     """
 
+async def chat_with_ai(history_messages: list, system_prompt: str, summary: str = "", use_cache: bool = True) -> str:
+    """
+    回归纯净聊天逻辑：
+    1. 接收历史记录，保证 AI 记得你之前说过的话。
+    2. 注入画像，保证 AI 了解你的身体状况。
+    3. 返回纯文本回复。
+    history_messages 只需要最近几条，更早的内容通过 summary 带上。
+    system_prompt 由 build_chat_system_prompt 渲染（见 services/persona.py 的快照缓存）。
+    同画像、同上下文的提问（比如首轮的“头疼怎么办”）会命中回复缓存，use_cache=False 可跳过。
+    """
+    system_instruction = with_history_summary(system_prompt, summary)
+
     try:
-        response = client.chat.completions.create(
-            model="qwen-plus",
-            messages=[{"role": "system", "content": system_instruction}] + history_messages,
+        return await create_completion(
+            [{"role": "system", "content": system_instruction}] + history_messages,
+            use_cache=use_cache,
+            caller="chat_with_ai",
             # 💡 注意：这里去掉了 response_format，回归普通文本
         )
-
-        return response.choices[0].message.content
     except Exception as e:
         print(f"AI 调用失败: {e}")
-        return "抱歉，我现在感觉大脑有点混乱，请稍后再试。"
+        return CHAT_FALLBACK_REPLY
+
+async def stream_chat_with_ai(history_messages: list, system_prompt: str, summary: str = "", use_cache: bool = True):
+    """
+    流式版本的 chat_with_ai：边生成边 yield 文本片段（delta）。
+    调用失败时 yield 兜底文案，保证调用方总能拼出一条完整回复。
+    """
+    system_instruction = with_history_summary(system_prompt, summary)
+    messages = [{"role": "system", "content": system_instruction}] + history_messages
+
+    # 与 chat_with_ai 共用缓存：命中就一次性吐出整段
+    start = time.perf_counter()
+    key = make_cache_key(CHAT_MODEL, messages) if use_cache else None
+    if key:
+        cached = await completion_cache.aget(key)
+        if cached is not None:
+            observe_llm("stream_chat_with_ai", time.perf_counter() - start, "cache_hit")
+            yield cached
+            return
+
+    parts = []
+    usage = None
+    try:
+        stream = await client.chat.completions.create(
+            model=CHAT_MODEL,
+            messages=messages,
+            stream=True,
+            stream_options={"include_usage": True},  # 最后一个 chunk 带上 token 用量
+        )
+        async for chunk in stream:
+            if chunk.usage:
+                usage = chunk.usage
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                if not parts:
+                    LLM_FIRST_TOKEN.observe(time.perf_counter() - start, function="stream_chat_with_ai")
+                parts.append(delta)
+                yield delta
+    except Exception as e:
+        print(f"AI 流式调用失败: {e}")
+        observe_llm("stream_chat_with_ai", time.perf_counter() - start, "error")
+        if not parts:
+            yield CHAT_FALLBACK_REPLY
+        return
+
+    observe_llm("stream_chat_with_ai", time.perf_counter() - start, "ok", usage)
+
+    # 完整生成成功才写缓存
+    if key and parts:
+        await completion_cache.aset(key, "".join(parts))
     
-def summarize_session_title(chat_content: str) -> str:
+async def summarize_history(previous_summary: str, messages: list, use_cache: bool = True) -> str | None:
+    """
+    增量更新对话摘要：旧摘要 + 新滚出窗口的几条消息 -> 新摘要。
+    失败返回 None，调用方保持原摘要不动，下次再试。
+    """
+    transcript = "\n".join(
+        f"{'用户' if m['role'] == 'user' else 'AI'}：{m['content']}" for m in messages
+    )
+    try:
+        content = await create_completion(
+            [
+                {"role": "system", "content": "你是一个医疗问诊记录员。请把【已有摘要】和【新增对话】合并成一段新的摘要，保留症状、持续时间、既往史、用药、过敏、医生建议等关键信息，300 字以内，不要输出多余文字。"},
+                {"role": "user", "content": f"【已有摘要】：{previous_summary or '无'}\n【新增对话】：\n{transcript}"}
+            ],
+            use_cache=use_cache,
+            cache_ttl=3600,
+            caller="summarize_history",
+            max_tokens=400
+        )
+        return content.strip()
+    except Exception as e:
+        print(f"更新对话摘要失败: {e}")
+        return None
+
+async def summarize_session_title(chat_content: str, use_cache: bool = True) -> str:
     """
     让 AI 根据聊天内容生成一个 6 字以内的简短标题
     """
     try:
-        response = client.chat.completions.create(
-            model="qwen-plus",
-            messages=[
+        content = await create_completion(
+            [
                 {"role": "system", "content": "你是一个助手，请根据用户提供的健康咨询片段，总结一个 9 字以内的简短标题。不要输出多余文字。"},
                 {"role": "user", "content": chat_content}
             ],
+            use_cache=use_cache,
+            cache_ttl=86400, # 标题不讲时效，缓存一天
+            caller="summarize_session_title",
             max_tokens=10 # 限制长度，节省资源
         )
-        title = response.choices[0].message.content.strip()
+        title = content.strip()
         # 去掉可能的标点符号
         return title.replace("。", "").replace("！", "").replace('"', "")
     except Exception as e:
         print(f"总结标题失败: {e}")
         return "健康咨询"    
     
-def generate_health_plan(chat_history: list, persona: dict) -> dict:
+async def generate_health_plan(chat_history: list, persona: dict, use_cache: bool = True) -> dict:
     """
     专门用于在问诊结束时，总结全案并生成结构化数据
     """
@@ -82,15 +226,17 @@ def generate_health_plan(chat_history: list, persona: dict) -> dict:
     """
     
     try:
-        response = client.chat.completions.create(
-            model="qwen-plus",
-            messages=[
+        content = await create_completion(
+            [
                 {"role": "system", "content": system_instruction},
                 {"role": "user", "content": f"请总结这段对话并开具方案：{str(chat_history)}"}
             ],
+            use_cache=use_cache,
+            cache_ttl=3600,
+            caller="generate_health_plan",
             response_format={ "type": "json_object" }
         )
-        return json.loads(response.choices[0].message.content)
+        return json.loads(content)
     except Exception as e:
         print(f"生成方案失败: {e}")
         return {"reply": "未能生成方案", "new_advice": [], "new_tasks": []}    
\ No newline at end of file
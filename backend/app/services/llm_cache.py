@@ -0,0 +1,203 @@
+# backend/app/services/llm_cache.py
+# AI 回复缓存：同一个模型 + 同样的消息（规范化后）直接复用上次结果
+# 两种存储可选：进程内 LRU（默认）/ SQLite 文件（多进程、重启后仍可命中）
+# 异步调用方用 aget / aset：会阻塞的存储（blocking = True，比如 SQLite 文件）自动丢到线程池，不卡事件循环
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+
+DEFAULT_TTL_SECONDS = 600
+DEFAULT_MAX_ENTRIES = 2000
+
+_ws = re.compile(r"\s+")
+
+def normalize_text(text) -> str:
+    # 去掉首尾空白、合并连续空白，"头疼怎么办 " 和 "头疼怎么办" 算同一句
+    if not isinstance(text, str):
+        return text
+    return _ws.sub(" ", text).strip()
+
+def make_cache_key(model: str, messages: list, **params) -> str:
+    """
+    model + 规范化后的 messages + 其他影响输出的参数（max_tokens / response_format 等）-> sha256
+    """
+    norm_messages = [
+        {"role": m.get("role"), "content": normalize_text(m.get("content"))}
+        for m in messages
+    ]
+    raw = json.dumps(
+        {"model": model, "messages": norm_messages, "params": params},
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+class CompletionCache(ABC):
+    """
+    缓存接口：get / set / clear / stats。自定义存储继承它、实现 _get / _set / size / clear，
+    即可通过 set_completion_cache 接入；读写要走磁盘 / 网络的存储把 blocking 设成 True
+    """
+    blocking = False  # True：读写会阻塞（文件 / 网络），异步调用时放到线程池
+
+    def __init__(self, ttl: int = DEFAULT_TTL_SECONDS, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[str]:
+        value = self._get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value: str, ttl: Optional[int] = None):
+        self._set(key, value, time.time() + (ttl or self.ttl))
+
+    async def aget(self, key: str) -> Optional[str]:
+        if self.blocking:
+            return await run_in_threadpool(self.get, key)
+        return self.get(key)
+
+    async def aset(self, key: str, value: str, ttl: Optional[int] = None):
+        if self.blocking:
+            await run_in_threadpool(self.set, key, value, ttl)
+        else:
+            self.set(key, value, ttl)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "backend": type(self).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "size": self.size(),
+            "max_entries": self.max_entries,
+        }
+
+    @abstractmethod
+    def _get(self, key: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    def _set(self, key: str, value: str, expires_at: float):
+        ...
+
+    @abstractmethod
+    def size(self) -> int:
+        ...
+
+    @abstractmethod
+    def clear(self):
+        ...
+
+class MemoryCompletionCache(CompletionCache):
+    """
+    进程内 LRU：超过 max_entries 淘汰最久没用的，过期的读到时顺手删掉
+    """
+    def __init__(self, ttl: int = DEFAULT_TTL_SECONDS, max_entries: int = DEFAULT_MAX_ENTRIES):
+        super().__init__(ttl, max_entries)
+        self._data: "OrderedDict[str, tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def _set(self, key, value, expires_at):
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def size(self):
+        return len(self._data)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+class SqliteCompletionCache(CompletionCache):
+    """
+    SQLite 存储：多个 worker 进程共享，重启不丢。按最近使用时间淘汰。
+    每次读写都要开文件、可能等写锁，异步调用时走线程池（blocking = True）
+    """
+    blocking = True
+
+    def __init__(self, path: str = "llm_cache.db", ttl: int = DEFAULT_TTL_SECONDS, max_entries: int = DEFAULT_MAX_ENTRIES):
+        super().__init__(ttl, max_entries)
+        self.path = path
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+                " expires_at REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_llm_cache_last_used ON llm_cache (last_used)")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5)
+        try:
+            with conn:  # 正常退出自动提交
+                yield conn
+        finally:
+            conn.close()
+
+    def _get(self, key):
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            row = conn.execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < now:
+                conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE llm_cache SET last_used = ? WHERE key = ?", (now, key))
+            return row[0]
+
+    def _set(self, key, value, expires_at):
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, value, expires_at, now),
+            )
+            conn.execute("DELETE FROM llm_cache WHERE expires_at < ?", (now,))
+            conn.execute(
+                "DELETE FROM llm_cache WHERE key IN ("
+                " SELECT key FROM llm_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def size(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+    def clear(self):
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM llm_cache")
@@ -0,0 +1,76 @@
+# backend/app/services/persona.py
+# 画像快照缓存：按成员缓存渲染好的问诊 system prompt 和生成方案用的简要画像
+# 快照按该用户成员列表的版本号（CollectionVersion 里的 members_key）失效：
+# 成员资料 / 风险标签的写接口都在同一个事务里 bump 这个版本，多个 worker 进程看到的是同一个版本号，
+# 哪个进程改的资料，其他进程下一轮对话都会重新渲染（过敏史 / 用药是安全红线，不能用旧的）。
+# 同一成员连续多轮对话的 system prompt 完全一致（也方便模型侧做前缀缓存）
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from sqlmodel import Session
+
+from app.models import FamilyMember
+from app.services.llm import build_chat_system_prompt
+from app.services.versions import get_version, members_key
+
+PERSONA_CACHE_SIZE = 1024
+
+@dataclass(frozen=True)
+class PersonaSnapshot:
+    member_id: int
+    user_id: int       # 成员的主人：缓存只按 member_id 存，命中时也要核对，不能把别人的画像拼进 prompt
+    version: int
+    chat_prompt: str   # 问诊 system prompt（已渲染）
+    brief: dict        # 生成方案用的简要画像
+
+_lock = threading.Lock()
+_cache: "OrderedDict[int, PersonaSnapshot]" = OrderedDict()
+
+def build_snapshot(member: FamilyMember, version: int) -> PersonaSnapshot:
+    persona_data = {
+        "gender": member.gender, "age": member.age, "height": member.height,
+        "weight": member.weight, "tags_json": member.tags_json,
+        "allergies": member.allergies, "meds": member.meds
+    }
+    persona_brief = {
+        "age": member.age,
+        "gender": member.gender,
+        "tags": member.tags_json,
+        "allergies": member.allergies
+    }
+    return PersonaSnapshot(
+        member_id=member.id,
+        user_id=member.user_id,
+        version=version,
+        chat_prompt=build_chat_system_prompt(persona_data),
+        brief=persona_brief,
+    )
+
+def get_persona_snapshot(db: Session, uid: int, member_id: int,
+                         version: int | None = None) -> PersonaSnapshot | None:
+    """
+    先查一次版本号（主键查询）：和快照的版本一致就直接返回，不查 FamilyMember、不重新渲染；
+    否则读一次 FamilyMember 并渲染。成员不属于 uid 的返回 None（命中缓存时同样要核对）。
+    调用方已经顺带查出版本号的（聊天接口跟会话一起取）可以传 version，省掉这一次查询。
+    版本号要在读成员之前取：读的过程中资料又被改了，快照挂在旧版本上，下一轮自然重建
+    """
+    if version is None:
+        version = get_version(db, members_key(uid))
+    with _lock:
+        snap = _cache.get(member_id)
+        if snap and snap.version == version:
+            _cache.move_to_end(member_id)
+            return snap if snap.user_id == uid else None
+
+    member = db.get(FamilyMember, member_id)
+    if not member or member.user_id != uid:
+        return None
+    snap = build_snapshot(member, version)
+
+    with _lock:
+        _cache[member_id] = snap
+        _cache.move_to_end(member_id)
+        while len(_cache) > PERSONA_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return snap
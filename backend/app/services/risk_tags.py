@@ -0,0 +1,95 @@
+# backend/app/services/risk_tags.py
+# 成员风险标签的读写：MemberRiskTag 表是主数据，FamilyMember.tags_json 同步写一份镜像
+# 标签字典格式统一为 {"糖尿病": {"level": 2, "score": 100}, ...}
+from datetime import datetime
+
+from sqlalchemy import delete, insert
+from sqlmodel import Session, select
+
+from app.core.serialization import dumps, loads
+from app.models import FamilyMember, MemberRiskTag
+
+DEFAULT_LEVEL = 2    # 新标签默认 Level 2（确诊）
+DEFAULT_SCORE = 100  # 起始风险满分
+
+def normalize_tags(tags) -> dict:
+    """
+    前端可能传列表 ['高血压', '肥胖']（每个标签初始化为 Level 2 / Score 100），
+    也可能传完整字典；None 视为空
+    """
+    if not tags:
+        return {}
+    if isinstance(tags, list):
+        return {tag: {"level": DEFAULT_LEVEL, "score": DEFAULT_SCORE} for tag in tags}
+    return tags
+
+def dump_tags(tags) -> str:
+    return dumps(normalize_tags(tags))
+
+def load_tags(s: str) -> dict:
+    """
+    解析 tags_json（兼容旧的列表格式），只在回填和兜底时用
+    """
+    try:
+        data = loads(s) if s else {}
+        # 核心兼容逻辑：如果读出来还是旧的列表格式 ['高血压']，升级为新格式
+        return normalize_tags(data) if isinstance(data, (list, dict)) else {}
+    except Exception:
+        return {}
+
+def tag_rows(member_id: int, tags: dict) -> list[dict]:
+    now = datetime.utcnow()
+    return [
+        {
+            "member_id": member_id,
+            "tag": tag,
+            "level": int(data.get("level", DEFAULT_LEVEL)),
+            "score": int(data.get("score", DEFAULT_SCORE)),
+            "updated_at": now,
+        }
+        for tag, data in tags.items()
+    ]
+
+def load_member_tags(db: Session, member_ids: list[int]) -> dict[int, dict]:
+    """
+    一次查询取多个成员的标签：{member_id: {tag: {"level", "score"}}}
+    """
+    result = {mid: {} for mid in member_ids}
+    if not member_ids:
+        return result
+    rows = db.exec(
+        select(MemberRiskTag.member_id, MemberRiskTag.tag, MemberRiskTag.level, MemberRiskTag.score)
+        .where(MemberRiskTag.member_id.in_(member_ids))
+        .order_by(MemberRiskTag.member_id, MemberRiskTag.id)
+    ).all()
+    for member_id, tag, level, score in rows:
+        result[member_id][tag] = {"level": level, "score": score}
+    return result
+
+def add_member_tags(db: Session, member_id: int, tags: dict):
+    """
+    只插入标签行（新建成员时用，不用先删）；不 commit
+    """
+    rows = tag_rows(member_id, tags)
+    if rows:
+        db.exec(insert(MemberRiskTag), params=rows)
+
+def set_member_tags(db: Session, member: FamilyMember, tags) -> dict:
+    """
+    整体替换成员的标签（表 + tags_json 镜像）；不 commit。member 需要已有 id
+    """
+    tags = normalize_tags(tags)
+    db.exec(delete(MemberRiskTag).where(MemberRiskTag.member_id == member.id))
+    add_member_tags(db, member.id, tags)
+    member.tags_json = dumps(tags)
+    db.add(member)
+    return tags
+
+def find_members_by_tag(db: Session, tag: str, level: int | None = None) -> list[int]:
+    """
+    人群查询：带某个标签（可选限定等级）的成员 id，走 (tag, level) 索引
+    """
+    stmt = select(MemberRiskTag.member_id).where(MemberRiskTag.tag == tag)
+    if level is not None:
+        stmt = stmt.where(MemberRiskTag.level == level)
+    return list(db.exec(stmt).all())
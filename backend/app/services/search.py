@@ -0,0 +1,181 @@
+# backend/app/services/search.py
+# 问诊记录全文检索（SQLite FTS5，trigram 分词）
+#
+# - 索引：chatmessage_fts(content) / consultsession_fts(title)，rowid 即源表 id，触发器同步增删改（迁移 m0006）
+# - trigram 按 3 个字切片，中文不用分词；但不足 3 个字的词（如“血压”）走不了 MATCH，改成 LIKE 条件：
+#   和长词一起出现时只在 MATCH 命中的行上过滤，只有短词时在该用户自己的会话里扫描
+# - 排序：走 MATCH 的按 bm25 相关度，纯 LIKE 的按时间倒序
+# - 老库的历史数据由 backfill_search_index 分批补进索引（启动时排进任务队列）
+# - 非 SQLite / 没有 FTS5 时整个退回 LIKE，接口行为不变，只是慢一些
+from sqlalchemy import DateTime, text
+from sqlmodel import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.db import engine
+from app.models import SearchIndexState
+
+SEARCH_MAX_TERMS = 8          # 一次最多几个关键词（空格分隔）
+SEARCH_SNIPPET_CHARS = 60     # 摘要片段长度
+SEARCH_BACKFILL_BATCH = 2000  # 补建索引每批行数（每批一个小事务）
+TRIGRAM_MIN_CHARS = 3         # trigram 能 MATCH 的最短词长
+
+FTS_TABLES = {
+    "chatmessage_fts": ("chatmessage", "content"),
+    "consultsession_fts": ("consultsession", "title"),
+}
+
+_fts_ready: bool | None = None
+
+def fts_available(db: Session) -> bool:
+    """
+    库里有没有 FTS 索引（进程内只查一次）
+    """
+    global _fts_ready
+    if _fts_ready is None:
+        _fts_ready = engine.dialect.name == "sqlite" and db.exec(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'chatmessage_fts'")
+        ).first() is not None
+    return _fts_ready
+
+def split_terms(q: str) -> list[str]:
+    return list(dict.fromkeys(q.split()))[:SEARCH_MAX_TERMS]
+
+def _match_expr(terms: list[str]) -> str:
+    # 每个词作为一个短语（双引号里的双引号要写两遍），多个词之间是 AND
+    return " ".join('"' + t.replace('"', '""') + '"' for t in terms)
+
+def _like_pattern(term: str) -> str:
+    return "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+# 每一路的结果列必须一致，才能 UNION ALL 后统一排序
+_MESSAGE_COLUMNS = (
+    "'message' AS kind, m.session_id AS session_id, m.id AS message_id, m.role AS role, "
+    "m.content AS text, m.created_at AS created_at, s.title AS session_title, s.member_id AS member_id"
+)
+_SESSION_COLUMNS = (
+    "'session' AS kind, s.id AS session_id, NULL AS message_id, NULL AS role, "
+    "s.title AS text, s.created_at AS created_at, s.title AS session_title, s.member_id AS member_id"
+)
+
+def _branch(kind: str, match: bool, like_params: list[str]) -> str:
+    """
+    一路查询（消息 / 会话标题）。match=True 时走 FTS 索引 + bm25，否则只用 LIKE 条件
+    """
+    if kind == "message":
+        fts, column, columns = "chatmessage_fts", "m.content", _MESSAGE_COLUMNS
+        source = "chatmessage m JOIN consultsession s ON s.id = m.session_id"
+        fts_source = f"{fts} JOIN chatmessage m ON m.id = {fts}.rowid JOIN consultsession s ON s.id = m.session_id"
+    else:
+        fts, column, columns = "consultsession_fts", "s.title", _SESSION_COLUMNS
+        source = "consultsession s"
+        fts_source = f"{fts} JOIN consultsession s ON s.id = {fts}.rowid"
+
+    where = ["s.user_id = :uid"]
+    if match:
+        where.append(f"{fts} MATCH :match")
+    where += [f"{column} LIKE :{p} ESCAPE '\\'" for p in like_params]
+    score = f"bm25({fts})" if match else "0.0"
+    return f"SELECT {columns}, {score} AS score FROM {fts_source if match else source} WHERE {' AND '.join(where)}"
+
+def search_history(db: Session, uid: int, q: str, limit: int, offset: int) -> tuple[list[dict], bool]:
+    """
+    在该用户的会话标题和聊天记录里搜 q（空格分隔的词全部命中）。返回 (命中列表, 是否还有下一页)
+    """
+    terms = split_terms(q)
+    use_fts = fts_available(db)
+    long_terms = [t for t in terms if len(t) >= TRIGRAM_MIN_CHARS] if use_fts else []
+    like_terms = [t for t in terms if t not in long_terms]
+
+    params: dict = {"uid": uid, "limit": limit + 1, "offset": offset}
+    if long_terms:
+        params["match"] = _match_expr(long_terms)
+    like_params = []
+    for i, t in enumerate(like_terms):
+        params[f"like{i}"] = _like_pattern(t)
+        like_params.append(f"like{i}")
+
+    match = bool(long_terms)
+    sql = (
+        f"{_branch('session', match, like_params)} UNION ALL {_branch('message', match, like_params)} "
+        "ORDER BY score, created_at DESC, message_id DESC LIMIT :limit OFFSET :offset"
+    )
+    rows = db.exec(text(sql).columns(created_at=DateTime), params=params).all()
+    has_more = len(rows) > limit
+
+    hits = [
+        {
+            "kind": r.kind,
+            "session_id": r.session_id,
+            "session_title": r.session_title,
+            "member_id": r.member_id,
+            "message_id": r.message_id,
+            "role": r.role,
+            "snippet": make_snippet(r.text, terms),
+            "created_at": r.created_at,
+        }
+        for r in rows[:limit]
+    ]
+    return hits, has_more
+
+def make_snippet(content: str, terms: list[str], size: int = SEARCH_SNIPPET_CHARS) -> str:
+    """
+    截取第一个命中词附近的一段文字（前端自己按 q 高亮）
+    """
+    content = " ".join(content.split())
+    if len(content) <= size:
+        return content
+    lowered = content.lower()
+    hits = [i for i in (lowered.find(t.lower()) for t in terms) if i >= 0]
+    pos = min(hits) if hits else 0
+    start = max(0, min(pos - size // 3, len(content) - size))
+    end = start + size
+    return ("…" if start > 0 else "") + content[start:end] + ("…" if end < len(content) else "")
+
+def _check_fts_ready() -> bool:
+    with Session(engine) as db:
+        return fts_available(db)
+
+def _backfill_batch(fts: str, source: str, column: str, batch_size: int) -> int | None:
+    """
+    补一批（一个小事务），返回这批新补进索引的行数；这张表已经补完返回 None
+    """
+    with Session(engine) as db:
+        state = db.get(SearchIndexState, fts)
+        if state is None or state.done_id >= state.target_id:
+            return None
+        lo, hi = state.done_id, min(state.target_id, state.done_id + batch_size)
+        result = db.exec(
+            text(
+                f"INSERT INTO {fts}(rowid, {column}) "
+                f"SELECT id, {column} FROM {source} WHERE id > :lo AND id <= :hi "
+                f"AND id NOT IN (SELECT rowid FROM {fts} WHERE rowid > :lo AND rowid <= :hi)"
+            ),
+            params={"lo": lo, "hi": hi},
+        )
+        state.done_id = hi
+        db.add(state)
+        db.commit()
+        return result.rowcount
+
+async def backfill_search_index(batch_size: int = SEARCH_BACKFILL_BATCH) -> dict:
+    """
+    后台任务：把建索引之前就有的老数据分批补进 FTS（每批一个小事务，放到线程池执行，
+    等写锁的时候不卡事件循环）。
+    已经在索引里的行（补建前被改过、触发器已经重建）跳过，重复执行也安全
+    """
+    if not await run_in_threadpool(_check_fts_ready):
+        return {"ok": True, "indexed": {}}
+
+    indexed = {}
+    for fts, (source, column) in FTS_TABLES.items():
+        total = 0
+        while True:
+            count = await run_in_threadpool(_backfill_batch, fts, source, column, batch_size)
+            if count is None:
+                break
+            total += count
+        indexed[fts] = total
+
+    if any(indexed.values()):
+        print(f"🔎 全文索引补建完成：{indexed}")
+    return {"ok": True, "indexed": indexed}
@@ -0,0 +1,201 @@
+# backend/app/services/task_log.py
+# 任务打卡：周期解析 + 打卡统计的增量维护
+#
+# - 一次性任务（freq 不是 每日/每周 这类）：打卡一次就 done
+# - 周期任务（每日 / 每日2次 / 每周3次 ...）：每次打卡记一条 TaskLog，done 不落库，
+#   而是按“本周期打卡次数是否达标”实时算；连续达标周期（streak）和达标率在 TaskItem 上增量维护
+# - 周期任务的统计字段用条件 UPDATE 写回（WHERE 本周期序号 / 次数还是读到的值），并发打卡不会超额、不会重复计数
+import os
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from functools import lru_cache
+from types import SimpleNamespace
+
+from sqlalchemy import and_, case, or_, update
+from sqlmodel import Session, select
+
+from app.models import TaskItem, TaskLog
+
+# 按哪个时区切“天”（默认东八区），数据库里的时间仍然是 UTC
+TASK_TZ_OFFSET_HOURS = int(os.getenv("TASK_TZ_OFFSET_HOURS", "8"))
+TASK_DETAIL_RECENT_LOGS = 10  # 详情页展示最近几条打卡记录
+COMPLETION_RETRIES = 3        # 周期任务打卡遇到并发修改时最多重读重试几次
+
+# record_completion 会改动的统计字段（周期任务不动 done，写回时跳过）
+STAT_FIELDS = (
+    "done", "log_count", "last_completed_at", "period_index", "period_count",
+    "completed_periods", "streak", "streak_index", "best_streak",
+)
+
+DAY = "day"
+WEEK = "week"
+
+_CN_DIGITS = {"一": 1, "两": 2, "二": 2, "三": 3, "四": 4, "五": 5, "六": 6, "七": 7, "八": 8, "九": 9, "十": 10}
+_PERIOD_RE = re.compile(r"每\s*(日|天|晚|早|周|星期)")
+_TIMES_RE = re.compile(r"(\d+|[一两二三四五六七八九十])\s*次")
+
+@dataclass(frozen=True)
+class Schedule:
+    period: str | None  # DAY / WEEK；None 表示一次性任务
+    times: int = 1      # 每个周期要打卡几次
+
+    @property
+    def recurring(self) -> bool:
+        return self.period is not None
+
+@lru_cache(maxsize=1024)
+def parse_freq(freq: str | None) -> Schedule:
+    """
+    '每日' / '每天 1 次' / '每日2次' / '每周三次' -> Schedule；其他（如 '由医生建议'）按一次性任务。
+    freq 的取值就那么几种，结果缓存起来，列表页逐行判断不用每次跑正则
+    """
+    m = _PERIOD_RE.search(freq or "")
+    if not m:
+        return Schedule(None)
+    period = WEEK if m.group(1) in ("周", "星期") else DAY
+    times = 1
+    t = _TIMES_RE.search(freq)
+    if t:
+        raw = t.group(1)
+        times = int(raw) if raw.isdigit() else _CN_DIGITS[raw]
+    return Schedule(period, max(1, times))
+
+def period_index(schedule: Schedule, ts: datetime) -> int:
+    """
+    时间所在的周期序号（天序号 / 周序号），相邻周期差 1
+    """
+    local_day = (ts + timedelta(hours=TASK_TZ_OFFSET_HOURS)).date().toordinal()
+    # toordinal() 的第 1 天是周一，(n - 1) // 7 正好按周一切周
+    return local_day if schedule.period == DAY else (local_day - 1) // 7
+
+def record_completion(task, now: datetime) -> bool:
+    """
+    把一次打卡计入 task 上的统计字段。本周期已达标（或一次性任务已完成）返回 False，不计入
+    """
+    schedule = parse_freq(task.freq)
+
+    if not schedule.recurring:
+        if task.done:
+            return False
+        task.done = True
+        task.log_count += 1
+        task.completed_periods = 1
+        task.last_completed_at = now
+        return True
+
+    idx = period_index(schedule, now)
+    if task.period_index != idx:
+        task.period_index = idx
+        task.period_count = 0
+    if task.period_count >= schedule.times:
+        return False
+
+    task.period_count += 1
+    task.log_count += 1
+    task.last_completed_at = now
+
+    # 本周期刚好达标：续上或重开连续记录
+    if task.period_count == schedule.times:
+        task.streak = task.streak + 1 if task.streak_index == idx - 1 else 1
+        task.streak_index = idx
+        task.best_streak = max(task.best_streak, task.streak)
+        task.completed_periods += 1
+    return True
+
+def complete_recurring(db: Session, tasks: list[TaskItem], now: datetime) -> set[int]:
+    """
+    批量给周期任务打卡，返回真正计入的任务 id；不 commit。
+    每个任务在统计字段的副本上算出新值，再用一条 UPDATE ... CASE id 写回，
+    WHERE 里每个任务都带上读到的 period_index / period_count，RETURNING 拿回写成功的 id。
+    期间有别的请求打过卡的任务匹配不上：重读这几行再算一次（本周期已达标就不再计入）。
+    task 对象本身不改，commit 时不会再被 ORM 刷回
+    """
+    completed: set[int] = set()
+    pending = list(tasks)
+    for _ in range(COMPLETION_RETRIES):
+        new_stats = {}
+        for t in pending:
+            stats = SimpleNamespace(freq=t.freq, **{f: getattr(t, f) for f in STAT_FIELDS})
+            if record_completion(stats, now):
+                new_stats[t.id] = stats
+        if not new_stats:
+            break
+
+        guard = or_(*(
+            and_(TaskItem.id == t.id, TaskItem.period_index == t.period_index, TaskItem.period_count == t.period_count)
+            for t in pending if t.id in new_stats
+        ))
+        values = {
+            f: case({tid: getattr(stats, f) for tid, stats in new_stats.items()}, value=TaskItem.id)
+            for f in STAT_FIELDS if f != "done"
+        }
+        updated = set(db.exec(
+            update(TaskItem)
+            .where(guard)
+            .values(**values)
+            .returning(TaskItem.id)
+            .execution_options(synchronize_session=False)
+        ).scalars())
+        completed |= updated
+
+        pending = [t for t in pending if t.id in new_stats and t.id not in updated]
+        if not pending:
+            break
+        for t in pending:
+            db.refresh(t)
+    return completed
+
+def is_done(task, now: datetime) -> bool:
+    """
+    一次性任务看 done；周期任务看本周期是否已达标
+    """
+    schedule = parse_freq(task.freq)
+    if not schedule.recurring:
+        return task.done
+    return task.period_index == period_index(schedule, now) and task.period_count >= schedule.times
+
+def task_stats(task, now: datetime) -> dict:
+    """
+    详情页统计，全部由 TaskItem 上的字段 O(1) 算出
+    """
+    schedule = parse_freq(task.freq)
+    if not schedule.recurring:
+        return {
+            "streak": task.completed_periods,
+            "best_streak": task.completed_periods,
+            "log_count": task.log_count,
+            "period_count": task.log_count,
+            "period_times": 1,
+            "adherence": 1.0 if task.done else 0.0,
+        }
+
+    idx = period_index(schedule, now)
+    done_now = is_done(task, now)
+    # 上个周期没达标，连续记录就断了
+    streak = task.streak if task.streak_index >= idx - 1 else 0
+
+    # 达标率 = 达标周期数 / 已经过去的周期数（本周期还没达标就先不算进分母）
+    elapsed = idx - period_index(schedule, task.created_at) + (1 if done_now else 0)
+    adherence = min(1.0, task.completed_periods / elapsed) if elapsed > 0 else (1.0 if done_now else 0.0)
+
+    return {
+        "streak": streak,
+        "best_streak": task.best_streak,
+        "log_count": task.log_count,
+        "period_count": task.period_count if task.period_index == idx else 0,
+        "period_times": schedule.times,
+        "adherence": round(adherence, 4),
+    }
+
+def recent_logs(db: Session, task_id: int, limit: int = TASK_DETAIL_RECENT_LOGS) -> list[str]:
+    """
+    最近几条打卡时间（走 (task_id, completed_at) 索引，只取 limit 条）
+    """
+    rows = db.exec(
+        select(TaskLog.completed_at)
+        .where(TaskLog.task_id == task_id)
+        .order_by(TaskLog.completed_at.desc(), TaskLog.id.desc())
+        .limit(limit)
+    ).all()
+    return [ts.isoformat(timespec="seconds") for ts in rows]
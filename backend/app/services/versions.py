@@ -0,0 +1,82 @@
+# backend/app/services/versions.py
+# 列表 ETag：每个列表一个版本号，存在 CollectionVersion 表里
+#
+# - 写接口在同一个事务里调用 bump_versions（和数据一起提交，多进程也一致）
+# - 列表接口先用 not_modified() 比 If-None-Match：版本没变直接 304，不查列表数据
+from datetime import datetime
+
+from fastapi import Request, Response
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlmodel import Session
+
+from app.models import CollectionVersion
+from app.services.task_log import DAY, Schedule, period_index
+
+def members_key(uid: int) -> str:
+    return f"members:u{uid}"
+
+def advice_key(uid: int, member_id: int) -> str:
+    return f"advice:u{uid}:m{member_id}"
+
+def tasks_key(uid: int, member_id: int) -> str:
+    return f"tasks:u{uid}:m{member_id}"
+
+def member_keys(uid: int, member_id: int) -> list[str]:
+    """
+    一个成员相关的全部列表（删除成员时一起作废）
+    """
+    return [members_key(uid), advice_key(uid, member_id), tasks_key(uid, member_id)]
+
+# INSERT ... ON CONFLICT DO UPDATE：SQLite（3.24+）和 Postgres 都支持，写法一样
+_UPSERT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+def bump_versions(db: Session, *keys: str):
+    """
+    版本号 +1；不 commit，跟着调用方的写操作一起提交。
+    一条 INSERT ... ON CONFLICT(key) DO UPDATE SET version = version + 1：第一次出现的 key 插入 1，
+    已有的 +1。两个请求同时第一次写同一个 key 也不会撞主键（先 UPDATE 再补 INSERT 的写法会）。
+    key 排好序再写，Postgres 上多个请求按同样的顺序加行锁，不会互相死锁
+    """
+    keys = sorted(set(keys))
+    if not keys:
+        return
+    insert = _UPSERT_INSERTS[db.get_bind().dialect.name]
+    stmt = insert(CollectionVersion).values([{"key": k, "version": 1} for k in keys])
+    db.exec(stmt.on_conflict_do_update(
+        index_elements=[CollectionVersion.key],
+        set_={"version": CollectionVersion.version + 1},
+    ))
+
+def get_version(db: Session, key: str) -> int:
+    row = db.get(CollectionVersion, key)
+    return row.version if row else 0
+
+def collection_etag(db: Session, key: str, *extra) -> str:
+    """
+    弱 ETag（W/）：同一版本下内容等价即可，不保证逐字节相同（比如标签 dict 的顺序）
+    """
+    return 'W/"' + "-".join([key, str(get_version(db, key)), *map(str, extra)]) + '"'
+
+def tasks_etag(db: Session, uid: int, member_id: int) -> str:
+    """
+    周期任务的 done 按“今天”算，跨天时即使没有写入也要换 ETag
+    """
+    today = period_index(Schedule(DAY), datetime.utcnow())
+    return collection_etag(db, tasks_key(uid, member_id), f"d{today}")
+
+def _opaque(tag: str) -> str:
+    return tag.strip().removeprefix("W/")
+
+def not_modified(request: Request, response: Response, etag: str) -> Response | None:
+    """
+    给响应带上 ETag；If-None-Match 命中时返回 304（调用方直接 return，不再查列表数据）
+    """
+    response.headers["ETag"] = etag
+    # 每次都带 If-None-Match 回来确认，不让浏览器凭启发式缓存直接用旧数据
+    response.headers["Cache-Control"] = "private, no-cache"
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return None
+    if if_none_match.strip() == "*" or _opaque(etag) in {_opaque(t) for t in if_none_match.split(",")}:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+    return None
@@ -0,0 +1,138 @@
+# backend/tools/bench_consult.py
+# 问诊接口端到端压测：按指定并发打 chat / chat/stream / generate_plan，输出 p50/p95/p99 和吞吐
+#
+# 用法（在 backend/ 下，先起桩服务和后端）：
+#   python tools/llm_stub.py --port 9000 --latency 0.8 --tps 40
+#   LLM_BASE_URL=http://127.0.0.1:9000/v1 uvicorn app.main:app --port 8000
+#   python tools/bench_consult.py --scenario chat --concurrency 50 --requests 500
+#
+# scenario:
+#   chat    POST /consult/{id}/chat，记录完整响应耗时
+#   stream  POST /consult/{id}/chat/stream，额外记录首 token 耗时（TTFT）
+#   plan    POST /consult/{id}/generate_plan + 轮询 /consult/jobs/{id}，记录提交耗时和出结果耗时
+import argparse
+import asyncio
+import time
+
+import httpx
+
+def percentile(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    k = min(len(values) - 1, max(0, round(p / 100 * len(values) + 0.5) - 1))
+    return values[k]
+
+def report(name: str, values: list[float], elapsed: float, errors: int):
+    ms = [v * 1000 for v in values]
+    print(
+        f"{name:<14} n={len(values):<6} err={errors:<4} "
+        f"p50={percentile(ms, 50):8.1f}ms p95={percentile(ms, 95):8.1f}ms "
+        f"p99={percentile(ms, 99):8.1f}ms  {len(values) / elapsed:8.1f} req/s"
+    )
+
+async def login(client: httpx.AsyncClient) -> dict:
+    resp = await client.post("/auth/dev")
+    resp.raise_for_status()
+    return {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+async def prepare_sessions(client: httpx.AsyncClient, headers: dict, n: int) -> list[int]:
+    members = (await client.get("/members", headers=headers)).json()
+    member_id = members[0]["id"]
+    ids = []
+    for _ in range(n):
+        resp = await client.post(f"/consult/sessions?member_id={member_id}", headers=headers)
+        resp.raise_for_status()
+        ids.append(resp.json()["id"])
+    return ids
+
+async def one_chat(client, headers, sid, i, stats):
+    t0 = time.perf_counter()
+    resp = await client.post(
+        f"/consult/{sid}/chat",
+        params={"content": f"压测第{i}句：头疼两天了怎么办", "fresh": "true"},
+        headers=headers,
+    )
+    resp.raise_for_status()
+    stats["latency"].append(time.perf_counter() - t0)
+
+async def one_stream(client, headers, sid, i, stats):
+    t0 = time.perf_counter()
+    first = None
+    async with client.stream(
+        "POST",
+        f"/consult/{sid}/chat/stream",
+        params={"content": f"压测第{i}句：头疼两天了怎么办", "fresh": "true"},
+        headers=headers,
+    ) as resp:
+        resp.raise_for_status()
+        async for line in resp.aiter_lines():
+            if first is None and line.startswith("data:"):
+                first = time.perf_counter() - t0
+    stats["latency"].append(time.perf_counter() - t0)
+    stats["ttft"].append(first or 0.0)
+
+async def one_plan(client, headers, sid, i, stats, poll_interval=0.2):
+    t0 = time.perf_counter()
+    resp = await client.post(f"/consult/{sid}/generate_plan", headers=headers)
+    resp.raise_for_status()
+    stats["submit"].append(time.perf_counter() - t0)
+    job_id = resp.json()["job_id"]
+    while True:
+        job = (await client.get(f"/consult/jobs/{job_id}", headers=headers)).json()
+        if job["status"] in ("done", "failed"):
+            break
+        await asyncio.sleep(poll_interval)
+    if job["status"] == "failed":
+        raise RuntimeError(job.get("error"))
+    stats["latency"].append(time.perf_counter() - t0)
+
+SCENARIOS = {"chat": one_chat, "stream": one_stream, "plan": one_plan}
+
+async def run(args):
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base, timeout=args.timeout, limits=limits) as client:
+        headers = await login(client)
+        # 每个并发槽位一个会话；plan 场景同会话会被去重，所以给每个请求单独开会话
+        n_sessions = args.requests if args.scenario == "plan" else args.concurrency
+        sessions = await prepare_sessions(client, headers, n_sessions)
+
+        fn = SCENARIOS[args.scenario]
+        stats = {"latency": [], "ttft": [], "submit": []}
+        errors = 0
+        counter = iter(range(args.requests))
+
+        async def worker(slot: int):
+            nonlocal errors
+            for i in counter:
+                sid = sessions[i] if args.scenario == "plan" else sessions[slot]
+                try:
+                    await fn(client, headers, sid, i, stats)
+                except Exception as e:
+                    errors += 1
+                    if errors <= 5:
+                        print(f"请求失败: {e!r}")
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(worker(s) for s in range(args.concurrency)))
+        elapsed = time.perf_counter() - t0
+
+    print(f"scenario={args.scenario} concurrency={args.concurrency} requests={args.requests} elapsed={elapsed:.2f}s")
+    report(args.scenario, stats["latency"], elapsed, errors)
+    if stats["ttft"]:
+        report("ttft", stats["ttft"], elapsed, errors)
+    if stats["submit"]:
+        report("plan_submit", stats["submit"], elapsed, errors)
+
+def main():
+    parser = argparse.ArgumentParser(description="问诊接口端到端压测")
+    parser.add_argument("--base", default="http://127.0.0.1:8000/api")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="chat")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
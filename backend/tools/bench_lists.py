@@ -0,0 +1,101 @@
+# backend/tools/bench_lists.py
+# 列表接口吞吐压测（进程内，不用起服务）：造几千行建议 / 任务 / 消息，反复请求列表接口
+#
+# 用法（在 backend/ 下）：
+#   python tools/bench_lists.py --rows 3000 --iterations 50
+#
+# 用独立的临时 SQLite 文件，不会碰 app.db
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def percentile(values: list[float], p: float) -> float:
+    values = sorted(values)
+    k = min(len(values) - 1, max(0, round(p / 100 * len(values) + 0.5) - 1))
+    return values[k]
+
+def seed(rows: int):
+    from sqlalchemy import insert
+    from sqlmodel import Session, select
+
+    from app.db import engine
+    from app.models import AdviceItem, ChatMessage, ConsultSession, FamilyMember, TaskItem, User
+
+    with Session(engine) as db:
+        user = db.exec(select(User)).first()
+        member = db.exec(select(FamilyMember).where(FamilyMember.user_id == user.id)).first()
+        cs = ConsultSession(user_id=user.id, member_id=member.id, title="压测会话")
+        db.add(cs)
+        db.commit()
+        db.refresh(cs)
+
+        tags = '["生活方式", "饮食", "睡眠"]'
+        detail = '["第一步：固定时间", "第二步：记录数据", "第三步：复盘"]'
+        db.exec(insert(AdviceItem), params=[
+            {"user_id": user.id, "member_id": member.id, "title": f"建议{i}",
+             "reason": "充足睡眠有助于缓解头痛，减少刺激性食物", "tags_json": tags, "detail_json": detail}
+            for i in range(rows)
+        ])
+        db.exec(insert(TaskItem), params=[
+            {"user_id": user.id, "member_id": member.id, "title": f"每日步行 30 分钟 #{i}",
+             "freq": "每日" if i % 2 else "由医生建议", "due": "尽快开始", "done": False,
+             "detail_json": detail, "logs_json": "[]"}
+            for i in range(rows)
+        ])
+        db.exec(insert(ChatMessage), params=[
+            {"session_id": cs.id, "role": "user" if i % 2 else "assistant",
+             "content": "头疼两天了怎么办？建议您多休息多喝水注意观察症状变化。" * 3}
+            for i in range(rows)
+        ])
+        db.commit()
+        return member.id, cs.id
+
+def run(args):
+    tmp = tempfile.mkdtemp(prefix="bench_lists_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as client:
+        token = client.post("/api/auth/dev").json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        member_id, session_id = seed(args.rows)
+
+        targets = {
+            "advice": f"/api/advice?member_id={member_id}",
+            "tasks": f"/api/tasks?member_id={member_id}",
+            "messages": f"/api/consult/{session_id}/messages",
+            "members": "/api/members",
+        }
+        print(f"rows={args.rows} iterations={args.iterations}")
+        for name, url in targets.items():
+            resp = client.get(url, headers=headers)
+            resp.raise_for_status()
+            n = len(resp.json())
+            times = []
+            t0 = time.perf_counter()
+            for _ in range(args.iterations):
+                s = time.perf_counter()
+                client.get(url, headers=headers).raise_for_status()
+                times.append(time.perf_counter() - s)
+            elapsed = time.perf_counter() - t0
+            ms = [t * 1000 for t in times]
+            print(
+                f"{name:<10} items={n:<6} p50={percentile(ms, 50):8.2f}ms "
+                f"p95={percentile(ms, 95):8.2f}ms  {args.iterations / elapsed:8.1f} req/s"
+            )
+
+def main():
+    parser = argparse.ArgumentParser(description="列表接口吞吐压测")
+    parser.add_argument("--rows", type=int, default=3000)
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+    run(args)
+
+if __name__ == "__main__":
+    main()
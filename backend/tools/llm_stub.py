@@ -0,0 +1,128 @@
+# backend/tools/llm_stub.py
+# 本地 OpenAI 兼容桩服务：模拟 /v1/chat/completions（普通 / JSON 模式 / 流式），用于压测 /consult/*
+#
+# 用法（在 backend/ 下）：
+#   python tools/llm_stub.py --port 9000 --latency 0.8 --tps 40
+#   LLM_BASE_URL=http://127.0.0.1:9000/v1 python run.py
+#
+# --latency  首 token 前的等待秒数（模拟排队 + prefill）
+# --tps      之后每秒吐出的 token 数（模拟生成速度）
+# --reply-tokens  普通聊天回复的 token 数
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+settings = {
+    "latency": 0.5,
+    "tps": 50.0,
+    "reply_tokens": 80,
+}
+
+app = FastAPI(title="LLM Stub")
+
+PLAN_JSON = {
+    "reply": "根据本次问诊，为您整理了以下方案。",
+    "new_advice": [
+        {"title": "规律作息", "reason": "充足睡眠有助于缓解头痛", "tags": ["生活方式"]},
+        {"title": "清淡饮食", "reason": "减少刺激性食物", "tags": ["饮食"]},
+    ],
+    "new_tasks": [
+        {"title": "每日步行 30 分钟", "freq": "每日", "due": "尽快开始"},
+        {"title": "早晚测量血压", "freq": "每日2次", "due": "尽快开始"},
+    ],
+}
+
+def make_reply(body: dict) -> list[str]:
+    """
+    按请求类型生成回复，并切成 token 列表（一个汉字算一个 token）
+    """
+    if (body.get("response_format") or {}).get("type") == "json_object":
+        text = json.dumps(PLAN_JSON, ensure_ascii=False)
+        # JSON 按 8 个字符一块切，避免 token 数太夸张
+        return [text[i:i + 8] for i in range(0, len(text), 8)]
+
+    max_tokens = body.get("max_tokens")
+    n = settings["reply_tokens"] if not max_tokens else min(max_tokens, settings["reply_tokens"])
+    base = "建议您多休息多喝水注意观察症状变化如果持续不缓解请及时就医"
+    return [base[i % len(base)] for i in range(n)]
+
+def usage_of(body: dict, tokens: list[str]) -> dict:
+    prompt_tokens = sum(len(str(m.get("content", ""))) for m in body.get("messages", []))
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": len(tokens),
+        "total_tokens": prompt_tokens + len(tokens),
+    }
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    model = body.get("model", "stub")
+    tokens = make_reply(body)
+    cid = f"chatcmpl-{uuid.uuid4().hex}"
+    created = int(time.time())
+    per_token = 1.0 / settings["tps"] if settings["tps"] > 0 else 0
+
+    if body.get("stream"):
+        async def gen():
+            await asyncio.sleep(settings["latency"])
+            for i, tok in enumerate(tokens):
+                if i:
+                    await asyncio.sleep(per_token)
+                chunk = {
+                    "id": cid,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": {"content": tok}, "finish_reason": None}],
+                }
+                yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+            last = {
+                "id": cid,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                "usage": usage_of(body, tokens),
+            }
+            yield f"data: {json.dumps(last, ensure_ascii=False)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(gen(), media_type="text/event-stream")
+
+    await asyncio.sleep(settings["latency"] + per_token * max(len(tokens) - 1, 0))
+    return {
+        "id": cid,
+        "object": "chat.completion",
+        "created": created,
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": "".join(tokens)},
+            "finish_reason": "stop",
+        }],
+        "usage": usage_of(body, tokens),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI 兼容的本地 LLM 桩服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency", type=float, default=settings["latency"])
+    parser.add_argument("--tps", type=float, default=settings["tps"])
+    parser.add_argument("--reply-tokens", type=int, default=settings["reply_tokens"])
+    args = parser.parse_args()
+
+    settings["latency"] = args.latency
+    settings["tps"] = args.tps
+    settings["reply_tokens"] = args.reply_tokens
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+# backend/tools/query_budget.py
+# SQL 条数预算检查：在内存 SQLite 上逐个请求接口，数每个请求执行了几条 SQL，超预算就失败（退出码 1）
+# 同一个请求里同一条 SQL 重复执行多次的，报成疑似 N+1
+#
+# 用法（在 backend/ 下）：
+#   python tools/query_budget.py            # 检查全部接口
+#   python tools/query_budget.py -v         # 同时打印每个请求执行的 SQL
+#   python tools/query_budget.py -k chat    # 只跑名字里带 chat 的
+#   make check                              # 提交前的检查入口：compileall + 本脚本
+#
+# AI 调用走 tools/llm_stub.py 的进程内实例（ASGITransport，不起端口），不算在 SQL 里
+# 预算只管“响应发完之前”执行的 SQL；响应之后的 BackgroundTasks（起标题、压摘要）和任务队列里的 job
+# 单独列出来，不计预算
+# 加新接口时在 SCENARIOS 里补一行预算；改代码导致多查了库，这里会直接报出来
+import argparse
+import os
+import re
+import sys
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# 必须在导入 app 之前设置：内存库（StaticPool，所有会话共用一个连接）
+os.environ["DATABASE_URL"] = "sqlite://"
+
+N_PLUS_ONE_THRESHOLD = 3  # 同一条 SQL 在一个请求里执行 >= 3 次算疑似 N+1
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    path: str            # 可以用 {member_id} / {session_id} / {task_id} ... 占位
+    budget: int
+    json: dict | None = None
+    wait_job: bool = False  # 返回 job_id 的接口：等 job 跑完再进下一个场景
+    conditional: bool = False  # 先不计数地请求一次拿 ETag，再带 If-None-Match 请求（应返回 304）
+
+# 每个接口允许的 SQL 条数上限（不含 AI 调用、不含响应之后的后台任务）
+# 预算按“设计上应该查几条”逐项加出来，不是照着实测值抄：条数只跟接口做了哪几步有关，跟数据量、批大小无关。
+# 改了接口的查询方式，先改这里的拆分，再看实测对不对得上
+ETAG = 1          # 列表接口查一次版本号算 ETag；带 If-None-Match 命中时只剩这一条
+BUMP = 1          # 写接口最后一条 upsert 把相关列表的版本号 +1（几个 key 一条语句）
+TAGS_WRITE = 2    # 重写风险标签：删旧标签 + executemany 插新标签
+TAGS_REFRESH = 5  # 打卡后重算标签：读成员 + 读标签 + 重写标签 + 回写 tags_json
+PERSONA_MISS = 1  # 资料改过之后第一轮聊天，画像快照重建要读一次 FamilyMember
+MEMBER_TABLES = 8  # 删成员时按 member_id 清理的表：标签/建议/任务/打卡/会话/消息/摘要/成员本身
+
+SCENARIOS = [
+    Scenario("list_members", "GET", "/api/members", 2 + ETAG),  # 成员 + 标签 IN 查询
+    Scenario("list_members_304", "GET", "/api/members", ETAG, conditional=True),
+    Scenario("create_member", "POST", "/api/members", 2 + BUMP,  # 插成员 + 插标签（新成员没有旧标签要删）
+             json={"name": "预算测试", "relation": "父亲", "tags": ["糖尿病", "高血压"]}),
+    Scenario("update_member", "PUT", "/api/members/{member_id}", 1 + TAGS_WRITE + 1 + BUMP,  # 读 + 标签 + 写回
+             json={"tags": ["糖尿病"], "notes": "x"}),
+    Scenario("list_advice", "GET", "/api/advice?member_id={member_id}", 1 + ETAG),
+    Scenario("list_advice_304", "GET", "/api/advice?member_id={member_id}", ETAG, conditional=True),
+    Scenario("advice_detail", "GET", "/api/advice/{advice_id}", 1),
+    Scenario("list_tasks", "GET", "/api/tasks?member_id={member_id}", 1 + ETAG),
+    Scenario("list_tasks_304", "GET", "/api/tasks?member_id={member_id}", ETAG, conditional=True),
+    Scenario("task_detail", "GET", "/api/tasks/{task_id}", 2),  # 任务 + 最近打卡记录
+    # 打卡：读任务 + 一次性任务条件 UPDATE + 打卡记录 executemany + 重算标签 + 版本号；
+    # 批量里有周期任务时再多一条 CASE UPDATE，和勾了几个任务无关
+    Scenario("complete_task", "POST", "/api/tasks/{task_id}/complete", 3 + TAGS_REFRESH + BUMP),
+    Scenario("complete_tasks_batch", "POST", "/api/tasks/complete", 4 + TAGS_REFRESH + BUMP,
+             json={"task_ids": "{task_ids}"}),
+    # 看板：成员 + 标签 / 任务 / 建议各一条 IN 查询，跟成员个数无关；只选部分字段时少查对应的块
+    Scenario("dashboard", "GET", "/api/dashboard", 4),
+    Scenario("dashboard_fields", "GET", "/api/dashboard?fields=name,tags,advice.title", 3),
+    Scenario("list_sessions", "GET", "/api/consult/sessions", 1),
+    # 搜索：会话标题 + 消息两路 UNION ALL 一条查询；够 3 个字走 FTS，不够的走 LIKE
+    Scenario("search", "GET", "/api/consult/search?q=热身第", 1),
+    Scenario("search_short", "GET", "/api/consult/search?q=热身", 1),
+    Scenario("get_messages", "GET", "/api/consult/{session_id}/messages?limit=20", 2),  # 会话归属 + 一页消息
+    # 聊天热路径 5 条：会话（顺带成员版本号）/ 存用户消息 / 摘要 / 未压缩的消息 / 存回复。
+    # 前面 update_member 改过资料，所以第一轮 chat 要重建画像；chat_stream 紧跟着，快照已命中
+    Scenario("chat", "POST", "/api/consult/{session_id}/chat?content=头疼两天了", 5 + PERSONA_MISS),
+    Scenario("chat_stream", "POST", "/api/consult/{session_id}/chat/stream?content=还是头疼", 5),
+    Scenario("generate_plan", "POST", "/api/consult/{session_id}/generate_plan", 1, wait_job=True),
+    # 导出：每张表一条流式查询，和数据量无关
+    Scenario("export", "GET", "/api/export", 5),
+    Scenario("export_gzip", "GET", "/api/export?gzip=true", 5),
+    # 导入：读一次成员 + 每块每张表一条 executemany + 版本号 +1
+    Scenario("import", "POST", "/api/import", 2 + BUMP,
+             json={"type": "advice", "data": {"member_id": "{member_id}", "title": "导入的建议"}}),
+    Scenario("delete_session", "DELETE", "/api/consult/sessions/{session_id}", 4),  # 归属 + 摘要/消息/会话
+    # 删成员：归属校验 + 每张表一条按 member_id 的 DELETE（不逐行）+ 版本号
+    Scenario("delete_member", "DELETE", "/api/members/{member_id}", 1 + MEMBER_TABLES + BUMP),
+]
+
+# 当前请求处在哪个阶段："request"（响应发完之前）/ "background"（响应之后的 BackgroundTasks）
+# 没有这个上下文的（任务队列 worker）记为 "job"
+_phase: ContextVar[dict | None] = ContextVar("query_budget_phase", default=None)
+
+class PhaseMiddleware:
+    """
+    包在 app 外面：响应体最后一块发出去之后，把当前请求切到 background 阶段
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        state = {"phase": "request"}
+        token = _phase.set(state)
+
+        async def send_wrapper(message):
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body"):
+                state["phase"] = "background"
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _phase.reset(token)
+
+@dataclass
+class Recorded:
+    request: list[str] = field(default_factory=list)
+    background: list[str] = field(default_factory=list)
+    job: list[str] = field(default_factory=list)
+
+class QueryRecorder:
+    """
+    挂在引擎的 before_cursor_execute 上，按阶段记下执行的每条 SQL（executemany 算一条）
+    """
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+        self.recorded = Recorded()
+        self.enabled = False
+        event.listen(engine, "before_cursor_execute", self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        if not self.enabled:
+            return
+        state = _phase.get()
+        phase = state["phase"] if state else "job"
+        getattr(self.recorded, phase).append(" ".join(statement.split()))
+
+    def start(self):
+        self.recorded = Recorded()
+        self.enabled = True
+
+    def stop(self) -> Recorded:
+        self.enabled = False
+        return self.recorded
+
+def n_plus_one_suspects(statements: list[str]) -> list[tuple[str, int]]:
+    counts = Counter(statements)
+    return [(s, n) for s, n in counts.most_common() if n >= N_PLUS_ONE_THRESHOLD]
+
+def use_stub_llm():
+    """
+    把 AI 客户端换成进程内的桩服务（tools/llm_stub.py），零延迟
+    """
+    import httpx
+    from openai import AsyncOpenAI
+
+    import llm_stub
+    from app.services import llm
+
+    llm_stub.settings.update(latency=0, tps=0)
+    llm.client = AsyncOpenAI(
+        api_key="stub",
+        base_url="http://llm-stub/v1",
+        http_client=httpx.AsyncClient(transport=httpx.ASGITransport(app=llm_stub.app)),
+    )
+
+def seed(client, headers) -> dict:
+    """
+    造一份够大的数据（多个成员 / 多条建议 / 多个任务），让按行多查的 N+1 能暴露出来
+    """
+    ids = {}
+    members = []
+    for i in range(3):
+        resp = client.post("/api/members", headers=headers, json={
+            "name": f"成员{i}", "relation": "家属", "tags": ["糖尿病", "肥胖", "高血压"],
+        })
+        members.append(resp.json()["id"])
+    ids["member_id"] = members[0]
+
+    for i in range(5):
+        a = client.post("/api/advice", headers=headers, json={
+            "member_id": members[0], "title": f"建议{i}", "tags": ["饮食"], "detail": ["第一步"],
+        }).json()
+    ids["advice_id"] = a["id"]
+
+    task_ids = []
+    for i, title in enumerate(["测血糖", "步行 30 分钟", "按时服药", "测血压", "早睡"]):
+        t = client.post("/api/tasks", headers=headers, json={
+            "member_id": members[0], "title": title, "freq": "每日" if i % 2 else "由医生建议",
+        }).json()
+        task_ids.append(t["id"])
+    ids["task_id"] = task_ids[0]
+    ids["task_ids"] = task_ids[1:]
+
+    session_id = client.post(f"/api/consult/sessions?member_id={members[0]}", headers=headers).json()["id"]
+    for i in range(3):
+        client.post(f"/api/consult/{session_id}/chat", params={"content": f"热身第{i}句"}, headers=headers)
+    ids["session_id"] = session_id
+    return ids
+
+def fill(value, ids: dict):
+    if isinstance(value, str):
+        m = re.fullmatch(r"\{(\w+)\}", value)
+        if m:
+            return ids[m.group(1)]
+        return value.format(**ids)
+    if isinstance(value, dict):
+        return {k: fill(v, ids) for k, v in value.items()}
+    return value
+
+def wait_job(client, headers, job_id: str, timeout: float = 10.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = client.get(f"/api/consult/jobs/{job_id}", headers=headers).json()
+        if job["status"] in ("done", "failed"):
+            return job
+        time.sleep(0.05)
+    raise TimeoutError(job_id)
+
+def run(args) -> int:
+    from fastapi.testclient import TestClient
+
+    from app.db import engine
+    from app.main import app
+
+    use_stub_llm()
+    recorder = QueryRecorder(engine)
+    failures = 0
+
+    with TestClient(PhaseMiddleware(app)) as client:
+        headers = {"Authorization": f"Bearer {client.post('/api/auth/dev').json()['access_token']}"}
+        ids = seed(client, headers)
+
+        print(f"{'scenario':<22} {'queries':>7} {'budget':>6}  result")
+        for sc in SCENARIOS:
+            if args.k and args.k not in sc.name:
+                continue
+            path = fill(sc.path, ids)
+            body = fill(sc.json, ids) if sc.json else None
+
+            req_headers = headers
+            if sc.conditional:
+                etag = client.request(sc.method, path, headers=headers).headers["etag"]
+                req_headers = {**headers, "If-None-Match": etag}
+
+            recorder.start()
+            resp = client.request(sc.method, path, headers=req_headers, json=body)
+            job_result = None
+            if sc.wait_job and resp.status_code < 400:
+                job_result = wait_job(client, headers, resp.json()["job_id"])
+            rec = recorder.stop()
+            # 轮询 job 的请求本身不算
+            if sc.wait_job:
+                rec.background = []
+
+            not_304 = sc.conditional and resp.status_code != 304
+            if resp.status_code >= 400 or not_304 or (job_result and job_result["status"] != "done"):
+                failures += 1
+                detail = job_result.get("error") if job_result else (resp.text[:120] or "没有返回 304")
+                print(f"{sc.name:<22} {'-':>7} {sc.budget:>6}  ❌ HTTP {resp.status_code}: {detail}")
+                continue
+
+            statements = rec.request
+            over = len(statements) > sc.budget
+            failures += over
+            mark = "❌ 超预算" if over else "✅"
+            extra = ", ".join(
+                f"{name} {len(stmts)}" for name, stmts in (("background", rec.background), ("job", rec.job)) if stmts
+            )
+            print(f"{sc.name:<22} {len(statements):>7} {sc.budget:>6}  {mark}" + (f"  （另有 {extra}）" if extra else ""))
+
+            for phase, stmts in (("", rec.request), ("background ", rec.background), ("job ", rec.job)):
+                for stmt, n in n_plus_one_suspects(stmts):
+                    print(f"{'':<22} ⚠️ {phase}疑似 N+1（{n} 次）：{stmt[:160]}")
+            if args.verbose:
+                for phase, stmts in (("request", rec.request), ("background", rec.background), ("job", rec.job)):
+                    for stmt in stmts:
+                        print(f"{'':<24}[{phase}] {stmt[:200]}")
+
+    if failures:
+        print(f"\n{failures} 个接口超出 SQL 预算或请求失败")
+        return 1
+    print("\n全部接口都在 SQL 预算内")
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description="接口 SQL 条数预算检查 + N+1 检测")
+    parser.add_argument("-v", "--verbose", action="store_true", help="打印每个请求执行的 SQL")
+    parser.add_argument("-k", default="", help="只跑名字里包含该字符串的场景")
+    args = parser.parse_args()
+    sys.exit(run(args))
+
+if __name__ == "__main__":
+    main()
@@ -81,3 +81,58 @@ export async function apiPost(path, body) {
   }
   return resp.json();
 }
+
+
+// 流式 POST（SSE）：每收到一段 delta 调一次 onDelta，结束时返回 done 事件里的完整消息
+export async function apiStream(path, onDelta) {
+  await devLoginIfNeeded();
+
+  const resp = await fetch(`${API_BASE}${path}`, {
+    method: "POST",
+    headers: {
+      Authorization: `Bearer ${getToken()}`,
+    },
+  });
+
+  if (!resp.ok) {
+    if (resp.status === 401) {
+      console.warn("检测到 Token 失效，正在自动清理并重启...");
+      localStorage.removeItem("ai_token");
+      location.reload();
+      return;
+    }
+    const text = await resp.text().catch(() => "");
+    throw new Error(`POST ${path} 失败：${resp.status} ${text}`);
+  }
+
+  const reader = resp.body.getReader();
+  const decoder = new TextDecoder();
+  let buf = "";
+  let done = null;
+
+  while (true) {
+    const { value, done: finished } = await reader.read();
+    if (finished) break;
+    buf += decoder.decode(value, { stream: true });
+
+    // SSE 以空行分隔事件
+    let idx;
+    while ((idx = buf.indexOf("\n\n")) >= 0) {
+      const raw = buf.slice(0, idx);
+      buf = buf.slice(idx + 2);
+
+      let event = "message";
+      let data = "";
+      for (const line of raw.split("\n")) {
+        if (line.startsWith("event:")) event = line.slice(6).trim();
+        else if (line.startsWith("data:")) data += line.slice(5).trim();
+      }
+      if (!data) continue;
+
+      const obj = JSON.parse(data);
+      if (event === "done") done = obj;
+      else if (obj.delta) onDelta(obj.delta);
+    }
+  }
+  return done;
+}